@@ -1,48 +1,48 @@
 """Tests for triton.chain module"""
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 from unittest.mock import Mock, patch, MagicMock, mock_open
+import pytest
 import pytz
-from web3.exceptions import ABIFunctionNotFound
+import requests
+from web3.exceptions import ContractLogicError
 
 from triton.chain import (
-    get_native_balance,
+    BalanceQuery,
+    ContractCall,
+    _OLAS_PRICE_CACHE,
+    _SLOTS_CACHE,
+    _encode_call,
+    _erc20_decimals,
+    _fetch_ipfs_metadata,
+    _get_metadata_hash,
+    _load_abi,
+    get_balances,
     load_contract,
     get_olas_balance,
-    get_mech_request_count,
-    get_staking_status,
+    get_staking_status_and_balances,
     get_olas_price,
     get_slots,
+    multicall,
     web3
 )
 from triton.constants import LOCAL_TIMEZONE
 
 
-class TestGetNativeBalance:
-    """Tests for get_native_balance function"""
-    
-    @patch('triton.chain.web3')
-    def test_get_native_balance_success(self, mock_web3):
-        """Test successful native balance retrieval"""
-        mock_web3.eth.get_balance.return_value = 1000000000000000000  # 1 ETH in wei
-        mock_web3.to_checksum_address = lambda x: x
-        mock_web3.from_wei.return_value = 1.0
-        
-        result = get_native_balance("0x1234567890abcdef1234567890abcdef12345678")
-        
-        assert result == 1.0
-        mock_web3.eth.get_balance.assert_called_once_with("0x1234567890abcdef1234567890abcdef12345678")
-        mock_web3.from_wei.assert_called_once_with(1000000000000000000, "ether")
-    
-    @patch('triton.chain.web3')
-    def test_get_native_balance_zero(self, mock_web3):
-        """Test zero native balance"""
-        mock_web3.eth.get_balance.return_value = 0
-        mock_web3.from_wei.return_value = 0.0
-        
-        result = get_native_balance("0x1234567890abcdef1234567890abcdef12345678")
-        
-        assert result == 0.0
+@pytest.fixture(autouse=True)
+def clear_caches(tmp_path, monkeypatch):
+    """Start every test with empty ABI, contract, metadata and price caches"""
+    monkeypatch.setattr("triton.chain.IPFS_CACHE_DIR", tmp_path / "ipfs")
+    _load_abi.cache_clear()
+    _encode_call.cache_clear()
+    _erc20_decimals.cache_clear()
+    _fetch_ipfs_metadata.cache_clear()
+    _get_metadata_hash.cache_clear()
+    load_contract.cache_clear()
+    _OLAS_PRICE_CACHE.clear()
+    _SLOTS_CACHE.clear()
 
 
 class TestLoadContract:
@@ -54,13 +54,12 @@ class TestLoadContract:
         """Test loading contract with ABI key"""
         mock_contract = MagicMock()
         mock_web3.eth.contract.return_value = mock_contract
-        mock_web3.to_checksum_address = lambda x: x
         
         result = load_contract("0x1234567890abcdef1234567890abcdef12345678", "test", True)
         
         assert result == mock_contract
         mock_web3.eth.contract.assert_called_once_with(
-            address="0x1234567890abcdef1234567890abcdef12345678",
+            address="0x1234567890AbcdEF1234567890aBcdef12345678",
             abi=[{"name": "test"}]
         )
     
@@ -70,16 +69,91 @@ class TestLoadContract:
         """Test loading contract without ABI key"""
         mock_contract = MagicMock()
         mock_web3.eth.contract.return_value = mock_contract
-        mock_web3.to_checksum_address = lambda x: x
         
         result = load_contract("0x1234567890abcdef1234567890abcdef12345678", "test", False)
         
         assert result == mock_contract
         mock_web3.eth.contract.assert_called_once_with(
-            address="0x1234567890abcdef1234567890abcdef12345678",
+            address="0x1234567890AbcdEF1234567890aBcdef12345678",
             abi=[{"name": "test"}]
         )
 
+    @patch('builtins.open', new_callable=mock_open, read_data='[{"name": "test"}]')
+    @patch('triton.chain.web3')
+    def test_load_contract_cached(self, mock_web3, mock_file):
+        """Test ABI files and contracts are loaded once per process"""
+
+        first = load_contract("0x1234567890abcdef1234567890abcdef12345678", "test", False)
+        second = load_contract("0x1234567890abcdef1234567890abcdef12345678", "test", False)
+        load_contract("0xabcdef1234567890abcdef1234567890abcdef12", "test", False)
+
+        assert first is second
+        assert mock_web3.eth.contract.call_count == 2
+        mock_file.assert_called_once()
+
+
+class TestGetBalances:
+    """Tests for get_balances function"""
+
+    QUERIES = [
+        BalanceQuery("0x1234567890abcdef1234567890abcdef12345678"),
+        BalanceQuery("0x1234567890abcdef1234567890abcdef12345678", "0xcE11e14225575945b8E6Dc0D4F2dD4C570f79d9f"),
+    ]
+
+    @patch('triton.chain._erc20_decimals', return_value=6)
+    @patch('triton.chain.multicall')
+    @patch('triton.chain.load_contract')
+    def test_get_balances_batched(self, mock_load_contract, mock_multicall, mock_decimals):
+        """Test native and ERC20 balances are read in one multicall"""
+        mock_multicall.return_value = [2 * 10**18, 3 * 10**6]
+
+        assert get_balances(self.QUERIES) == [2.0, 3.0]
+
+        calls = mock_multicall.call_args[0][0]
+        assert [(call.fn_name, call.args) for call in calls] == [
+            ("getEthBalance", ("0x1234567890AbcdEF1234567890aBcdef12345678",)),
+            ("balanceOf", ("0x1234567890AbcdEF1234567890aBcdef12345678",)),
+        ]
+        mock_decimals.assert_called_once_with("0xcE11e14225575945b8E6Dc0D4F2dD4C570f79d9f")
+
+    @patch('triton.chain._erc20_decimals', return_value=6)
+    @patch('triton.chain.multicall')
+    @patch('triton.chain.load_contract')
+    def test_get_balances_shared_cache(self, mock_load_contract, mock_multicall, mock_decimals):
+        """Test balances already read through a shared cache are not read again"""
+        mock_multicall.side_effect = lambda calls: [2 * 10**18, 3 * 10**6][:len(calls)]
+        cache = {}
+
+        assert get_balances(self.QUERIES, cache) == [2.0, 3.0]
+        assert get_balances(self.QUERIES[:1], cache) == [2.0]
+
+        mock_multicall.assert_called_once()
+
+    @patch('triton.chain.multicall', side_effect=requests.ConnectionError("RPC down"))
+    @patch('triton.chain.web3')
+    @patch('triton.chain.load_contract')
+    def test_get_balances_shared_cache_error(self, mock_load_contract, mock_web3, mock_multicall):
+        """Test a failed read is raised to every caller sharing the cache"""
+        mock_web3.eth.get_balance.side_effect = requests.ConnectionError("RPC down")
+        cache = {}
+
+        with pytest.raises(requests.ConnectionError):
+            get_balances(self.QUERIES[:1], cache)
+        with pytest.raises(requests.ConnectionError):
+            get_balances(self.QUERIES[:1], cache)
+
+    @patch('triton.chain._erc20_decimals', return_value=18)
+    @patch('triton.chain.web3')
+    @patch('triton.chain.multicall', side_effect=ContractLogicError("Multicall to getEthBalance failed"))
+    @patch('triton.chain.load_contract')
+    def test_get_balances_fallback(self, mock_load_contract, mock_multicall, mock_web3, mock_decimals):
+        """Test balances are read one by one when the multicall fails"""
+        mock_web3.eth.get_balance.return_value = 2 * 10**18
+        mock_load_contract.return_value.functions.balanceOf.return_value.call.return_value = 3 * 10**18
+
+        assert get_balances(self.QUERIES) == [2.0, 3.0]
+        mock_web3.eth.get_balance.assert_called_once_with("0x1234567890AbcdEF1234567890aBcdef12345678")
+
 
 class TestGetOlasBalance:
     """Tests for get_olas_balance function"""
@@ -108,93 +182,124 @@ class TestGetOlasBalance:
         assert result == 0
 
 
-class TestGetMechRequestCount:
-    """Tests for get_mech_request_count function"""
-    
+class TestMulticall:
+    """Tests for multicall function"""
+
     @patch('triton.chain.load_contract')
-    def test_get_mech_request_count_success(self, mock_load_contract):
-        """Test successful mech request count retrieval"""
-        mock_contract = MagicMock()
-        mock_contract.functions.mapRequestsCounts.return_value.call.return_value = 5
-        mock_load_contract.return_value = mock_contract
-        
-        result = get_mech_request_count(
-            "0x1234567890abcdef1234567890abcdef12345678",
-            "0xabcdef1234567890abcdef1234567890abcdef12"
+    def test_multicall_decodes_results(self, mock_load_contract):
+        """Test results are decoded in order and allowed failures map to None"""
+        token = web3.eth.contract(
+            address="0xcE11e14225575945b8E6Dc0D4F2dD4C570f79d9f",
+            abi=[
+                {"name": "decimals", "type": "function", "stateMutability": "view", "inputs": [], "outputs": [{"name": "", "type": "uint8"}]},
+                {"name": "balanceOf", "type": "function", "stateMutability": "view", "inputs": [{"name": "owner", "type": "address"}], "outputs": [{"name": "", "type": "uint256"}]},
+            ],
         )
-        
-        assert result == 5
-        mock_contract.functions.mapRequestsCounts.assert_called_once_with(
-            "0xabcdef1234567890abcdef1234567890abcdef12"
+        mock_multicall3 = MagicMock()
+        mock_multicall3.functions.aggregate3.return_value.call.return_value = [
+            (True, web3.codec.encode(["uint8"], [18])),
+            (False, b""),
+        ]
+        mock_load_contract.return_value = mock_multicall3
+
+        result = multicall([
+            ContractCall(token, "decimals"),
+            ContractCall(token, "balanceOf", ("0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f",), allow_failure=True),
+        ])
+
+        assert result == [18, None]
+        calls = mock_multicall3.functions.aggregate3.call_args[0][0]
+        assert [(target, allow_failure) for target, allow_failure, _ in calls] == [
+            ("0xcE11e14225575945b8E6Dc0D4F2dD4C570f79d9f", False),
+            ("0xcE11e14225575945b8E6Dc0D4F2dD4C570f79d9f", True),
+        ]
+
+    @patch('triton.chain.load_contract')
+    def test_multicall_calldata_cached(self, mock_load_contract):
+        """Test the calldata of a repeated call is encoded once"""
+        token = MagicMock()
+        token.encode_abi.return_value = "0x70a08231"
+        mock_load_contract.return_value.functions.aggregate3.return_value.call.return_value = [(True, b"\x01")]
+        call = ContractCall(token, "balanceOf", ("0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f",), raw=True)
+
+        assert multicall([call]) == multicall([call]) == [b"\x01"]
+        token.encode_abi.assert_called_once_with(
+            fn_name="balanceOf", args=["0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f"]
         )
-    
+
     @patch('triton.chain.load_contract')
-    def test_get_mech_request_count_fallback(self, mock_load_contract):
-        """Test fallback to mapRequestCounts on exception"""
-        mock_contract = MagicMock()
-        mock_contract.functions.mapRequestsCounts.return_value.call.side_effect = ABIFunctionNotFound("Not found")
-        mock_contract.functions.mapRequestCounts.return_value.call.return_value = 3
-        mock_load_contract.return_value = mock_contract
-        
-        result = get_mech_request_count(
-            "0x1234567890abcdef1234567890abcdef12345678",
-            "0xabcdef1234567890abcdef1234567890abcdef12"
+    def test_multicall_raw_result(self, mock_load_contract):
+        """Test raw calls return the undecoded return data"""
+        token = web3.eth.contract(
+            address="0xcE11e14225575945b8E6Dc0D4F2dD4C570f79d9f",
+            abi=[{"name": "decimals", "type": "function", "stateMutability": "view", "inputs": [], "outputs": [{"name": "", "type": "uint8"}]}],
         )
-        
-        assert result == 3
-        mock_contract.functions.mapRequestCounts.assert_called_once_with(
-            "0xabcdef1234567890abcdef1234567890abcdef12"
+        return_data = web3.codec.encode(["uint8"], [18])
+        mock_load_contract.return_value.functions.aggregate3.return_value.call.return_value = [(True, return_data)]
+
+        assert multicall([ContractCall(token, "decimals", raw=True)]) == [return_data]
+
+    @patch('triton.chain.load_contract')
+    def test_multicall_required_call_failure(self, mock_load_contract):
+        """Test a failed call that is not allowed to fail raises"""
+        token = web3.eth.contract(
+            address="0xcE11e14225575945b8E6Dc0D4F2dD4C570f79d9f",
+            abi=[{"name": "decimals", "type": "function", "stateMutability": "view", "inputs": [], "outputs": [{"name": "", "type": "uint8"}]}],
         )
+        mock_load_contract.return_value.functions.aggregate3.return_value.call.return_value = [(False, b"")]
+
+        with pytest.raises(ContractLogicError):
+            multicall([ContractCall(token, "decimals")])
 
 
 class TestGetStakingStatus:
-    """Tests for get_staking_status function"""
-    
-    @patch('triton.chain.get_mech_request_count')
+    """Tests for get_staking_status_and_balances function"""
+
+    SERVICE_INFO = [
+        "0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f",
+        "0x67f6086f87D7698F0a2C37530B0f3549c304D04E",
+        "1752808320",
+        "15216712962976289600",
+        "0"
+    ]
+    SERVICE_INFO_CHECKPOINT = [
+        "0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f",
+        "0x67f6086f87D7698F0a2C37530B0f3549c304D04E",
+        [
+            7240,
+            93
+        ],
+        "1752808320",
+        "15216712962976289600",
+        "0"
+    ]
+
+    @pytest.mark.parametrize(
+        "mech_requests_counts,mech_request_counts",
+        [
+            (126, None),
+            # Newer mechs only expose mapRequestCounts
+            (None, 126),
+        ],
+    )
+    @patch('triton.chain.multicall')
     @patch('triton.chain.load_contract')
     @patch('triton.chain.wei_to_olas')
-    @patch('triton.chain.requests.get')
-    def test_get_staking_status_success(self, mock_requests, mock_wei_to_olas, mock_load_contract, mock_get_mech_request_count):
+    @patch('triton.chain._http.get')
+    def test_get_staking_status_success(self, mock_http, mock_wei_to_olas, mock_load_contract, mock_multicall, mech_requests_counts, mech_request_counts):
         """Test successful staking status retrieval"""
-        # Mock contracts
-        mock_staking_contract = MagicMock()
-        mock_activity_contract = MagicMock()
-        
-        # Mock contract responses
-        mock_staking_contract.functions.mapServiceInfo.return_value.call.return_value = [
-            "0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f",
-            "0x67f6086f87D7698F0a2C37530B0f3549c304D04E",
-            "1752808320",
-            "15216712962976289600",
-            "0"
+        mock_multicall.return_value = [
+            self.SERVICE_INFO,
+            self.SERVICE_INFO_CHECKPOINT,
+            mech_requests_counts,
+            mech_request_counts,
+            462962962962960,  # livenessRatio
+            86400,  # livenessPeriod
+            1753007240,  # tsCheckpoint
         ]
-        mock_staking_contract.functions.getServiceInfo.return_value.call.return_value = [
-            "0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f",
-            "0x67f6086f87D7698F0a2C37530B0f3549c304D04E",
-            [
-                7240,
-                93
-            ],
-            "1752808320",
-            "15216712962976289600",
-            "0"
-        ]
-        mock_staking_contract.functions.livenessPeriod.return_value.call.return_value = 86400
-        mock_staking_contract.functions.tsCheckpoint.return_value.call.return_value = 1753007240
-        mock_activity_contract.functions.livenessRatio.return_value.call.return_value = 462962962962960
-        
-        # Mock load_contract to return appropriate contracts
-        def load_contract_side_effect(address, abi_name, has_abi_key=True):
-            if abi_name == "staking_token":
-                return mock_staking_contract
-            elif abi_name == "mech_activity":
-                return mock_activity_contract
-            return MagicMock()
-        
-        mock_load_contract.side_effect = load_contract_side_effect
-        mock_get_mech_request_count.return_value = 126
+        mock_load_contract.return_value.functions.metadataHash.return_value.call.return_value = bytes.fromhex("12" * 32)
         mock_wei_to_olas.return_value = "1.00 OLAS"
-        
+
         mock_response = Mock()
         mock_response.status_code = HTTPStatus.OK
         mock_response.json.return_value = {
@@ -202,16 +307,20 @@ class TestGetStakingStatus:
             "description": "Test staking program",
             "available_staking_slots": 100
         }
-        mock_requests.return_value = mock_response
+        mock_http.return_value = mock_response
 
-        result = get_staking_status(
+        result, balances = get_staking_status_and_balances(
             "0x735FAAb1c4Ec41128c367AFb5c3baC73509f70bB",
             "0x9c7F6103e3a72E4d1805b9C683Ea5B370Ec1a99f",
             "0x29e3f37CB7a4f4F00a07Ea7BE956006163809298",
             1259,
-            "0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f"
+            "0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f",
+            [],
         )
-        
+
+        assert balances == []
+
+        assert mock_multicall.call_count == 1
         assert result["accrued_rewards"] == "1.00 OLAS"
         assert result["mech_requests_this_epoch"] == 33
         assert result["required_mech_requests"] == 40
@@ -224,69 +333,292 @@ class TestGetStakingStatus:
             "description": "Test staking program",
             "available_staking_slots": 100,
         }
+        assert "12" * 32 in mock_http.call_args[0][0]
+
+    STAKING_RESULTS = [
+        SERVICE_INFO,
+        SERVICE_INFO_CHECKPOINT,
+        126,
+        None,
+        462962962962960,  # livenessRatio
+        86400,  # livenessPeriod
+        1753007240,  # tsCheckpoint
+    ]
+    STAKING_ARGS = (
+        "0x735FAAb1c4Ec41128c367AFb5c3baC73509f70bB",
+        "0x9c7F6103e3a72E4d1805b9C683Ea5B370Ec1a99f",
+        "0x29e3f37CB7a4f4F00a07Ea7BE956006163809298",
+        1259,
+        "0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f",
+    )
+
+    @patch('triton.chain._erc20_decimals', return_value=18)
+    @patch('triton.chain._fetch_ipfs_metadata', return_value={"name": "Staking Program 1"})
+    @patch('triton.chain._get_metadata_hash', return_value="12" * 32)
+    @patch('triton.chain.multicall')
+    @patch('triton.chain.load_contract')
+    @patch('triton.chain.wei_to_olas', return_value="1.00 OLAS")
+    def test_get_staking_status_and_balances(self, mock_wei_to_olas, mock_load_contract, mock_multicall, mock_metadata_hash, mock_fetch_metadata, mock_decimals):
+        """Test the staking status and the balances are read in one multicall"""
+        mock_multicall.side_effect = lambda calls: (self.STAKING_RESULTS + [2 * 10**18, 3 * 10**18])[:len(calls)]
+        args = self.STAKING_ARGS
+        cache = {}
+
+        status, balances = get_staking_status_and_balances(*args, TestGetBalances.QUERIES, cache)
+
+        assert len(mock_multicall.call_args[0][0]) == 9
+        assert status["mech_requests_this_epoch"] == 33
+        assert status["metadata"] == {"name": "Staking Program 1"}
+        assert balances == [2.0, 3.0]
+
+        # Balances already in the cache leave only the staking calls to read
+        status, balances = get_staking_status_and_balances(*args, TestGetBalances.QUERIES, cache)
+
+        assert mock_multicall.call_count == 2
+        assert len(mock_multicall.call_args[0][0]) == 7
+        assert status["required_mech_requests"] == 40
+        assert balances == [2.0, 3.0]
+
+    @patch('triton.chain._erc20_decimals', return_value=18)
+    @patch('triton.chain._fetch_ipfs_metadata', return_value={"name": "Staking Program 1"})
+    @patch('triton.chain._get_metadata_hash', return_value="12" * 32)
+    @patch('triton.chain.multicall')
+    @patch('triton.chain.load_contract')
+    @patch('triton.chain.wei_to_olas', return_value="1.00 OLAS")
+    def test_get_staking_status_and_balances_fallback(self, mock_wei_to_olas, mock_load_contract, mock_multicall, mock_metadata_hash, mock_fetch_metadata, mock_decimals):
+        """Test a failed combined read is retried as separate staking and balance reads"""
+        def multicall(calls):
+            if len(calls) == 9:
+                raise ContractLogicError("Multicall to balanceOf failed")
+            return self.STAKING_RESULTS if len(calls) == 7 else [2 * 10**18, 3 * 10**18]
+
+        mock_multicall.side_effect = multicall
+
+        status, balances = get_staking_status_and_balances(*self.STAKING_ARGS, TestGetBalances.QUERIES)
+
+        assert [len(call[0][0]) for call in mock_multicall.call_args_list] == [9, 2, 7]
+        assert status["mech_requests_this_epoch"] == 33
+        assert balances == [2.0, 3.0]
+
+    @patch('triton.chain._erc20_decimals', return_value=18)
+    @patch('triton.chain.multicall')
+    @patch('triton.chain.load_contract')
+    def test_get_staking_status_and_balances_staking_error(self, mock_load_contract, mock_multicall, mock_decimals):
+        """Test a failed staking read does not fail the balances shared with other callers"""
+        def multicall(calls):
+            if len(calls) == 2:
+                return [2 * 10**18, 3 * 10**18]
+            raise requests.ConnectionError("RPC down")
+
+        mock_multicall.side_effect = multicall
+        cache = {}
+
+        with pytest.raises(requests.ConnectionError):
+            get_staking_status_and_balances(*self.STAKING_ARGS, TestGetBalances.QUERIES, cache)
+
+        assert get_balances(TestGetBalances.QUERIES, cache) == [2.0, 3.0]
+
+    @patch('triton.chain.load_contract')
+    def test_get_metadata_hash_cached(self, mock_load_contract):
+        """Test the metadata hash is read once per staking contract"""
+        mock_call = mock_load_contract.return_value.functions.metadataHash.return_value.call
+        mock_call.return_value = bytes.fromhex("12" * 32)
+
+        assert _get_metadata_hash("0x9c7F6103e3a72E4d1805b9C683Ea5B370Ec1a99f") == "12" * 32
+        assert _get_metadata_hash("0x9c7F6103e3a72E4d1805b9C683Ea5B370Ec1a99f") == "12" * 32
+
+        assert mock_call.call_count == 1
+
+    @patch('triton.chain._http.get')
+    def test_fetch_ipfs_metadata_cached(self, mock_http):
+        """Test IPFS metadata is fetched once per hash"""
+        mock_http.return_value = Mock(status_code=HTTPStatus.OK, json=lambda: {"name": "Staking Program 1"})
+
+        assert _fetch_ipfs_metadata("12" * 32) == {"name": "Staking Program 1"}
+        assert _fetch_ipfs_metadata("12" * 32) == {"name": "Staking Program 1"}
+        _fetch_ipfs_metadata("34" * 32)
+
+        assert mock_http.call_count == 2
+
+    @patch('triton.chain._http.get')
+    def test_fetch_ipfs_metadata_disk_cache(self, mock_http, tmp_path):
+        """Test IPFS metadata is persisted and reused after the memory cache is cleared"""
+        mock_http.return_value = Mock(status_code=HTTPStatus.OK, json=lambda: {"name": "Staking Program 1"})
+
+        _fetch_ipfs_metadata("12" * 32)
+        _fetch_ipfs_metadata.cache_clear()
+
+        assert _fetch_ipfs_metadata("12" * 32) == {"name": "Staking Program 1"}
+        assert (tmp_path / "ipfs" / f"{'12' * 32}.json").exists()
+        assert mock_http.call_count == 1
+
+    @patch('triton.chain._http.get')
+    def test_fetch_ipfs_metadata_concurrent_writes(self, mock_http, tmp_path):
+        """Test threads caching the same metadata at once each write their own temporary file"""
+        barrier = threading.Barrier(4, timeout=5)
+
+        def get(*args, **kwargs):
+            barrier.wait()  # Every thread misses the disk cache before any write
+            return Mock(status_code=HTTPStatus.OK, json=lambda: {"name": "Staking Program 1"})
+
+        mock_http.side_effect = get
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(_fetch_ipfs_metadata.__wrapped__, ["12" * 32] * 4))
+
+        assert results == [{"name": "Staking Program 1"}] * 4
+        assert [path.name for path in (tmp_path / "ipfs").iterdir()] == [f"{'12' * 32}.json"]
+
+    @patch('triton.chain._http.get')
+    def test_fetch_ipfs_metadata_error(self, mock_http):
+        """Test IPFS errors raise and are not cached"""
+        mock_http.return_value = Mock(status_code=HTTPStatus.NOT_FOUND)
+
+        with pytest.raises(requests.RequestException):
+            _fetch_ipfs_metadata("12" * 32)
+        with pytest.raises(requests.RequestException):
+            _fetch_ipfs_metadata("12" * 32)
+
+        assert mock_http.call_count == 2
+
+    @patch('triton.chain.multicall')
+    @patch('triton.chain.load_contract')
+    @patch('triton.chain.wei_to_olas')
+    def test_get_staking_status_no_mech_request_count(self, mock_wei_to_olas, mock_load_contract, mock_multicall):
+        """Test staking status fails when neither mech request counter is available"""
+        mock_multicall.return_value = [
+            self.SERVICE_INFO,
+            self.SERVICE_INFO_CHECKPOINT,
+            None,
+            None,
+            462962962962960,
+            86400,
+            1753007240,
+        ]
+
+        with pytest.raises(ValueError, match="mech request count"):
+            get_staking_status_and_balances(
+                "0x735FAAb1c4Ec41128c367AFb5c3baC73509f70bB",
+                "0x9c7F6103e3a72E4d1805b9C683Ea5B370Ec1a99f",
+                "0x29e3f37CB7a4f4F00a07Ea7BE956006163809298",
+                1259,
+                "0x59536E0e06FE394Aa82a4d40B0087b5f19841E2f",
+                [],
+            )
 
 
 class TestGetOlasPrice:
     """Tests for get_olas_price function"""
     
-    @patch('triton.chain.requests')
-    def test_get_olas_price_success(self, mock_requests):
+    @patch('triton.chain._http')
+    def test_get_olas_price_success(self, mock_http):
         """Test successful OLAS price retrieval"""
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"autonolas": {"usd": 1.23}}
-        mock_requests.get.return_value = mock_response
+        mock_http.get.return_value = mock_response
         
         result = get_olas_price()
         
         assert result == 1.23
-        mock_requests.get.assert_called_once()
+        mock_http.get.assert_called_once()
+        assert mock_http.get.call_args.kwargs["url"].startswith(
+            "https://api.coingecko.com/api/v3/simple/price?ids=autonolas&vs_currencies=usd&x_cg_demo_api_key="
+        )
     
-    @patch('triton.chain.requests')
+    @patch('triton.chain._http')
     @patch('triton.chain.logger')
-    def test_get_olas_price_error(self, mock_logger, mock_requests):
+    def test_get_olas_price_error(self, mock_logger, mock_http):
         """Test OLAS price retrieval with API error"""
         mock_response = MagicMock()
         mock_response.status_code = 500
-        mock_requests.get.return_value = mock_response
+        mock_http.get.return_value = mock_response
         
         result = get_olas_price()
         
         assert result is None
         mock_logger.error.assert_called_once_with(mock_response)
 
+    @patch('triton.chain._http')
+    def test_get_olas_price_cached(self, mock_http):
+        """Test OLAS price is reused within the TTL and refetched afterwards"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"autonolas": {"usd": 1.23}}
+        mock_http.get.return_value = mock_response
+
+        with patch('triton.chain.monotonic', return_value=1000.0):
+            assert get_olas_price() == 1.23
+            assert get_olas_price() == 1.23
+        assert mock_http.get.call_count == 1
+
+        with patch('triton.chain.monotonic', return_value=1061.0):
+            assert get_olas_price() == 1.23
+        assert mock_http.get.call_count == 2
+
+    @patch('triton.chain._http')
+    @patch('triton.chain.logger')
+    def test_get_olas_price_error_not_cached(self, mock_logger, mock_http):
+        """Test failed OLAS price lookups are not cached"""
+        mock_response = MagicMock()
+        mock_response.status_code = 500
+        mock_http.get.return_value = mock_response
+
+        assert get_olas_price() is None
+        assert get_olas_price() is None
+        assert mock_http.get.call_count == 2
+
 
 class TestGetSlots:
     """Tests for get_slots function"""
     
-    @patch('triton.chain.STAKING_CONTRACTS', {
-        "Test Contract 1": {"address": "0x1234567890abcdef1234567890abcdef12345678", "slots": 10},
-        "Test Contract 2": {"address": "0xabcdef1234567890abcdef1234567890abcdef12", "slots": 20}
-    })
+    @patch('triton.chain.STAKING_CONTRACTS_CHECKSUMMED', (
+        ("Test Contract 1", "0x1234567890AbcdEF1234567890aBcdef12345678", 10),
+        ("Test Contract 2", "0xabCDEF1234567890ABcDEF1234567890aBCDeF12", 20),
+    ))
+    @patch('triton.chain.multicall')
     @patch('triton.chain.load_contract')
-    @patch('triton.chain.web3')
-    def test_get_slots_success(self, mock_web3, mock_load_contract):
+    def test_get_slots_success(self, mock_load_contract, mock_multicall):
         """Test successful slots retrieval"""
-        mock_web3.to_checksum_address.side_effect = lambda x: x.upper()
-        
-        # Mock contracts
-        mock_contract_1 = MagicMock()
-        mock_contract_1.functions.getServiceIds.return_value.call.return_value = [1, 2, 3]  # 3 services
-        
-        mock_contract_2 = MagicMock()
-        mock_contract_2.functions.getServiceIds.return_value.call.return_value = [1, 2, 3, 4, 5]  # 5 services
-        
-        mock_load_contract.side_effect = [mock_contract_1, mock_contract_2]
-        
+        mock_multicall.return_value = [
+            web3.codec.encode(["uint256[]"], [[1, 2, 3]]),  # 3 services
+            web3.codec.encode(["uint256[]"], [[1, 2, 3, 4, 5]]),  # 5 services
+        ]
+
         result = get_slots()
-        
+
         assert result == {
             "Test Contract 1": 7,  # 10 - 3
             "Test Contract 2": 15  # 20 - 5
         }
         assert mock_load_contract.call_count == 2
-    
-    @patch('triton.chain.STAKING_CONTRACTS', {})
+        assert mock_multicall.call_count == 1
+        assert [(call.fn_name, call.raw) for call in mock_multicall.call_args[0][0]] == [
+            ("getServiceIds", True),
+            ("getServiceIds", True),
+        ]
+
+    @patch('triton.chain.STAKING_CONTRACTS_CHECKSUMMED', (
+        ("Test Contract 1", "0x1234567890AbcdEF1234567890aBcdef12345678", 10),
+    ))
+    @patch('triton.chain.monotonic')
+    @patch('triton.chain.multicall')
+    @patch('triton.chain.load_contract')
+    def test_get_slots_cached(self, mock_load_contract, mock_multicall, mock_monotonic):
+        """Test slots are reused within SLOTS_TTL and read again afterwards"""
+        mock_multicall.return_value = [web3.codec.encode(["uint256[]"], [[1, 2, 3]])]
+        mock_monotonic.return_value = 0
+
+        assert get_slots() == {"Test Contract 1": 7}
+        mock_monotonic.return_value = 4
+        assert get_slots() == {"Test Contract 1": 7}
+        assert mock_multicall.call_count == 1
+
+        mock_monotonic.return_value = 5
+        get_slots()
+        assert mock_multicall.call_count == 2
+
+    @patch('triton.chain.STAKING_CONTRACTS_CHECKSUMMED', ())
     def test_get_slots_empty_contracts(self):
         """Test get_slots with empty contracts dictionary"""
         result = get_slots()
@@ -1,399 +1,489 @@
 """Tests for triton.service module"""
 import logging
-import os
 import pytest
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from typing import Tuple
+from unittest.mock import ANY, patch, MagicMock
 
 from operate.operate_types import Chain
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
 from triton.service import TritonService
+from triton.tools import ttl_cache_clear
 
+pytestmark = pytest.mark.unit
 
-class TestTritonService:
-    """Tests for TritonService class"""
-    
-    def setup_method(self):
-        """Setup test fixtures"""
-        self.mock_operate = MagicMock()
-        self.mock_service_manager = MagicMock()
-        self.mock_wallet_manager = MagicMock()
-        self.mock_master_wallet = MagicMock()
-        self.mock_service = MagicMock()
-        
-        # Setup mock chains
-        self.mock_operate.service_manager.return_value = self.mock_service_manager
-        self.mock_operate.wallet_manager = self.mock_wallet_manager
-        self.mock_wallet_manager.load.return_value = self.mock_master_wallet
-        self.mock_service_manager.load.return_value = self.mock_service
-        
-        # Setup mock service properties
-        self.mock_service.name = "test_service"
-        self.mock_service.service_config_id = "test_config_id"
-        self.mock_service.home_chain = "gnosis"
-        self.mock_service.keys = [MagicMock()]
-        self.mock_service.keys[0].private_key = "test_private_key"
-        
-        # Setup mock chain configs
-        mock_chain_config = MagicMock()
-        mock_chain_data = MagicMock()
-        mock_chain_data.multisig = "0x1234567890abcdef1234567890abcdef12345678"
-        mock_chain_data.token = 123
-        mock_chain_data.instances = ["0xabcdef1234567890abcdef1234567890abcdef12"]
-        mock_chain_config.chain_data = mock_chain_data
-        
-        self.mock_service.chain_configs = {"gnosis": mock_chain_config}
-    
-    @patch.dict(os.environ, {"WITHDRAWAL_ADDRESS": "0x1111111111111111111111111111111111111111"})
-    def test_init_with_withdrawal_address(self):
-        """Test TritonService initialization with withdrawal address"""
-        service = TritonService(self.mock_operate, "test_config_id")
-        
-        assert service.service_manager == self.mock_service_manager
-        assert service.master_wallet == self.mock_master_wallet
-        assert service.service == self.mock_service
-        assert service.withdrawal_address == "0x1111111111111111111111111111111111111111"
-        assert isinstance(service.logger, logging.Logger)
-    
-    @patch.dict(os.environ, {}, clear=True)
-    def test_init_without_withdrawal_address(self):
-        """Test TritonService initialization without withdrawal address"""
-        service = TritonService(self.mock_operate, "test_config_id")
-        
-        assert service.withdrawal_address is None
-    
-    def test_service_id_property(self):
-        """Test service_id property"""
-        service = TritonService(self.mock_operate, "test_config_id")
-        
-        assert service.service_id == 123
-    
-    def test_agent_address_property(self):
-        """Test agent_address property"""
-        service = TritonService(self.mock_operate, "test_config_id")
-        
-        assert service.agent_address == "0xabcdef1234567890abcdef1234567890abcdef12"
-    
-    def test_agent_address_property_no_instances(self):
-        """Test agent_address property when no instances exist"""
-        self.mock_service.chain_configs["gnosis"].chain_data.instances = []
-        
-        with pytest.raises(ValueError, match="No agent instances found"):
-            service = TritonService(self.mock_operate, "test_config_id")
-            service.agent_address
-    
-    def test_service_safe_property(self):
-        """Test service_safe property"""
-        service = TritonService(self.mock_operate, "test_config_id")
-        
-        assert service.service_safe == "0x1234567890abcdef1234567890abcdef12345678"
-    
-    @patch('triton.service.get_staking_contract')
-    def test_staking_contract_address_property(self, mock_get_staking_contract):
-        """Test staking_contract_address property"""
-        mock_get_staking_contract.return_value = "0x2222222222222222222222222222222222222222"
-        self.mock_service_manager._get_current_staking_program.return_value = "program_1"
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        
-        assert service.staking_contract_address == "0x2222222222222222222222222222222222222222"
-        mock_get_staking_contract.assert_called_once_with(
-            chain="gnosis",
-            staking_program_id="program_1"
-        )
-    
-    def test_staking_contract_address_property_key_error(self):
-        """Test staking_contract_address property with KeyError"""
-        self.mock_service_manager._get_current_staking_program.side_effect = KeyError("Not found")
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        
-        with pytest.raises(ValueError, match="Failed to get staking contract address"):
-            service.staking_contract_address
-    
-    @patch('triton.service.get_staking_status')
-    @patch('triton.service.get_staking_contract')
-    @patch('triton.service.RequesterActivityCheckerContract')
-    def test_get_staking_status_success_with_mech_marketplace(self, mock_requester_contract, mock_get_staking_contract, mock_get_staking_status):
-        """Test get_staking_status method success when mechMarketplace call works"""
-        mock_get_staking_contract.return_value = "0x2222222222222222222222222222222222222222"
-        mock_get_staking_status.return_value = {
-            "accrued_rewards": "1.00 OLAS",
-            "mech_requests_this_epoch": 5,
-            "required_mech_requests": 10,
-            "epoch_end": "2023-01-01 12:00:00 UTC"
-        }
-        self.mock_service_manager._get_current_staking_program.return_value = "program_1"
-        
-        # Mock the safe tx builder and staking params
-        mock_sftxb = MagicMock()
-        mock_sftxb.get_staking_params.return_value = {"activity_checker": "0xactivity123"}
-        self.mock_service_manager.get_eth_safe_tx_builder.return_value = mock_sftxb
-        
-        # Mock RequesterActivityCheckerContract to succeed
-        mock_contract_instance = MagicMock()
-        mock_contract_instance.functions.mechMarketplace.return_value.call.return_value = "0xmech123"
-        mock_requester_instance = MagicMock()
-        mock_requester_instance.get_instance.return_value = mock_contract_instance
-        mock_requester_contract.from_dir.return_value = mock_requester_instance
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        result = service.get_staking_status()
-        
-        assert result["accrued_rewards"] == "1.00 OLAS"
-        assert result["mech_requests_this_epoch"] == 5
-        mock_get_staking_status.assert_called_once_with(
-            mech_contract_address="0xmech123",
-            staking_token_address="0x2222222222222222222222222222222222222222",
-            activity_checker_address="0xactivity123",
-            service_id=123,
-            safe_address="0x1234567890abcdef1234567890abcdef12345678"
-        )
-    
-    @patch('triton.service.get_staking_status')
-    @patch('triton.service.get_staking_contract')
-    @patch('triton.service.RequesterActivityCheckerContract')
-    @patch('triton.service.MechActivityContract')
-    def test_get_staking_status_success_with_agent_mech(self, mock_mech_contract, mock_requester_contract, mock_get_staking_contract, mock_get_staking_status):
-        """Test get_staking_status method success when mechMarketplace fails but agentMech works"""
-        mock_get_staking_contract.return_value = "0x2222222222222222222222222222222222222222"
-        mock_get_staking_status.return_value = {
-            "accrued_rewards": "2.00 OLAS",
-            "mech_requests_this_epoch": 8,
-            "required_mech_requests": 10,
-            "epoch_end": "2023-01-01 12:00:00 UTC"
-        }
-        self.mock_service_manager._get_current_staking_program.return_value = "program_1"
-        
-        # Mock the safe tx builder and staking params
-        mock_sftxb = MagicMock()
-        mock_sftxb.get_staking_params.return_value = {"activity_checker": "0xactivity123"}
-        self.mock_service_manager.get_eth_safe_tx_builder.return_value = mock_sftxb
-        
-        # Mock RequesterActivityCheckerContract to fail
-        mock_requester_contract.from_dir.side_effect = Exception("RequesterActivityChecker failed")
-        
-        # Mock MechActivityContract to succeed
-        mock_mech_instance = MagicMock()
-        mock_mech_instance.functions.agentMech.return_value.call.return_value = "0xagentmech456"
-        mock_mech_contract_instance = MagicMock()
-        mock_mech_contract_instance.get_instance.return_value = mock_mech_instance
-        mock_mech_contract.from_dir.return_value = mock_mech_contract_instance
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        result = service.get_staking_status()
-        
-        assert result["accrued_rewards"] == "2.00 OLAS"
-        assert result["mech_requests_this_epoch"] == 8
-        mock_get_staking_status.assert_called_once_with(
-            mech_contract_address="0xagentmech456",
-            staking_token_address="0x2222222222222222222222222222222222222222",
-            activity_checker_address="0xactivity123",
-            service_id=123,
-            safe_address="0x1234567890abcdef1234567890abcdef12345678"
-        )
-    
-    @patch('triton.service.get_staking_status')
-    @patch('triton.service.get_staking_contract')
-    @patch('triton.service.RequesterActivityCheckerContract')
-    @patch('triton.service.MechActivityContract')
-    def test_get_staking_status_success_with_fallback_mech(self, mock_mech_contract, mock_requester_contract, mock_get_staking_contract, mock_get_staking_status):
-        """Test get_staking_status method success when both contract calls fail and fallback is used"""
-        mock_get_staking_contract.return_value = "0x2222222222222222222222222222222222222222"
-        mock_get_staking_status.return_value = {
-            "accrued_rewards": "0.50 OLAS",
-            "mech_requests_this_epoch": 3,
-            "required_mech_requests": 10,
-            "epoch_end": "2023-01-01 12:00:00 UTC"
-        }
-        self.mock_service_manager._get_current_staking_program.return_value = "program_1"
-        
-        # Mock the safe tx builder and staking params
-        mock_sftxb = MagicMock()
-        mock_sftxb.get_staking_params.return_value = {"activity_checker": "0xactivity123"}
-        self.mock_service_manager.get_eth_safe_tx_builder.return_value = mock_sftxb
-        
-        # Mock both contracts to fail
-        mock_requester_contract.from_dir.side_effect = Exception("RequesterActivityChecker failed")
-        mock_mech_contract.from_dir.side_effect = Exception("MechActivity failed")
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        result = service.get_staking_status()
-        
-        assert result["accrued_rewards"] == "0.50 OLAS"
-        assert result["mech_requests_this_epoch"] == 3
-        mock_get_staking_status.assert_called_once_with(
-            mech_contract_address="0x77af31De935740567Cf4fF1986D04B2c964A786a",  # Hardcoded fallback
-            staking_token_address="0x2222222222222222222222222222222222222222",
-            activity_checker_address="0xactivity123",
-            service_id=123,
-            safe_address="0x1234567890abcdef1234567890abcdef12345678"
-        )
-    
-    @patch('triton.service.get_olas_balance')
-    @patch('triton.service.get_native_balance')
-    @patch('triton.service.get_wrapped_native_balance')
-    def test_check_balance_success(self, mock_get_wrapped_native_balance, mock_get_native_balance, mock_get_olas_balance):
-        """Test check_balance method success"""
-        mock_get_native_balance.side_effect = [1.0, 2.0, 3.0, 4.0]  # agent, service, master eoa, master safe
-        mock_get_wrapped_native_balance.return_value = 1.0
-        mock_get_olas_balance.return_value = 5000000000000000000  # 5 OLAS in wei
-        
-        # Mock master wallet properties
-        self.mock_master_wallet.crypto.address = "0x3333333333333333333333333333333333333333"
-        self.mock_master_wallet.safes = {Chain.GNOSIS: "0x4444444444444444444444444444444444444444"}
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        result = service.check_balance()
-        
-        assert result["agent_eoa_native_balance"] == 1.0
-        assert result["service_safe_native_balance"] == 2.0
-        assert result["service_safe_wrapped_native_balance"] == 1.0
-        assert result["master_eoa_native_balance"] == 3.0
-        assert result["master_safe_native_balance"] == 4.0
-        assert result["service_safe_olas_balance"] == 5.0  # 5 OLAS
-        assert mock_get_native_balance.call_count == 4
-        assert mock_get_wrapped_native_balance.call_count == 1
-    
-    def test_check_balance_no_instances(self):
-        """Test check_balance method when no instances exist"""
-        self.mock_service.chain_configs["gnosis"].chain_data.instances = []
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        
-        with pytest.raises(ValueError, match="No agent instances found"):
-            service.check_balance()
-    
-    def test_claim_rewards_success(self):
-        """Test claim_rewards method success"""
-        self.mock_service_manager.claim_on_chain_from_safe.return_value = 1234
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        result = service.claim_rewards()
-        
-        assert result == 1234
-        self.mock_service_manager.claim_on_chain_from_safe.assert_called_once_with(
-            service_config_id="test_config_id",
-            chain="gnosis"
+SAFE_ADDR = "0x1234567890abcdef1234567890abcdef12345678"
+AGENT_ADDR = "0xabcdef1234567890abcdef1234567890abcdef12"
+STAKING_ADDR = "0x2222222222222222222222222222222222222222"
+WITHDRAWAL_ADDR = "0x1111111111111111111111111111111111111111"
+
+_STAKING_STATUS_A = {
+    "accrued_rewards": "1.00 OLAS",
+    "mech_requests_this_epoch": 5,
+    "required_mech_requests": 10,
+    "epoch_end": "2023-01-01 12:00:00 UTC",
+}
+_STAKING_STATUS_B = {
+    "accrued_rewards": "2.00 OLAS",
+    "mech_requests_this_epoch": 8,
+    "required_mech_requests": 10,
+    "epoch_end": "2023-01-01 12:00:00 UTC",
+}
+_STAKING_STATUS_C = {
+    "accrued_rewards": "0.50 OLAS",
+    "mech_requests_this_epoch": 3,
+    "required_mech_requests": 10,
+    "epoch_end": "2023-01-01 12:00:00 UTC",
+}
+
+EXPECTED_BALANCES = {
+    "agent_eoa_native_balance": 1.0,
+    "service_safe_native_balance": 2.0,
+    "service_safe_wrapped_native_balance": 1.0,
+    "master_eoa_native_balance": 3.0,
+    "master_safe_native_balance": 4.0,
+    "master_safe_olas_balance": 5.0,  # 5 OLAS
+    "service_safe_olas_balance": 5.0,  # 5 OLAS
+}
+
+
+def _wire_base_mocks(operate, service_manager, master_wallet, service):
+    """(Re)apply the known return values and attributes of the mock graph"""
+    operate.service_manager.return_value = service_manager
+    operate.wallet_manager.load.return_value = master_wallet
+    service_manager.load.return_value = service
+
+    # Setup mock service properties
+    service.name = "test_service"
+    service.service_config_id = "test_config_id"
+    service.home_chain = "gnosis"
+    service.keys[0].private_key = "test_private_key"
+
+    # Setup mock chain configs
+    mock_chain_data = service.chain_configs["gnosis"].chain_data
+    mock_chain_data.multisig = SAFE_ADDR
+    mock_chain_data.token = 123
+    mock_chain_data.instances = [AGENT_ADDR]
+
+
+def build_mock_operate() -> Tuple[MagicMock, MagicMock, MagicMock, MagicMock]:
+    """Build a pre-wired (operate, service_manager, master_wallet, service) mock graph"""
+    operate = MagicMock()
+    service_manager = MagicMock()
+    master_wallet = MagicMock()
+    service = MagicMock()
+
+    # Pure data holders, only ever read
+    service.keys = [SimpleNamespace()]
+    service.chain_configs = {
+        "gnosis": SimpleNamespace(
+            chain_data=SimpleNamespace(), ledger_config=SimpleNamespace()
         )
-    
-    @patch('triton.service.traceback')
-    def test_claim_rewards_exception(self, mock_traceback):
-        """Test claim_rewards method with exception"""
-        self.mock_service_manager.claim_on_chain_from_safe.side_effect = Exception("Test error")
-        mock_traceback.format_exc.return_value = "Traceback info"
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        service.logger.error = MagicMock()
-        result = service.claim_rewards()
-        
-        assert result == 0
-        service.logger.error.assert_called_once()
-    
-    @patch.dict(os.environ, {}, clear=True)
-    def test_withdraw_rewards_no_withdrawal_address(self):
-        """Test withdraw_rewards method without withdrawal address"""
-        service = TritonService(self.mock_operate, "test_config_id")
-        
-        result = service.withdraw_rewards()
-        
-        assert result == []
-    
-    @patch.dict(os.environ, {"WITHDRAWAL_ADDRESS": "0x1111111111111111111111111111111111111111"})
-    @patch('triton.service.get_olas_balance')
-    def test_withdraw_rewards_no_balance(self, mock_get_olas_balance):
-        """Test withdraw_rewards method with no OLAS balance"""
-        mock_get_olas_balance.return_value = 0
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        result = service.withdraw_rewards()
-        
-        assert result == []
-    
-    @patch.dict(os.environ, {"WITHDRAWAL_ADDRESS": "0x1111111111111111111111111111111111111111"})
-    @patch('triton.service.get_olas_balance')
-    @patch('triton.service.traceback')
-    def test_withdraw_rewards_get_balance_exception(self, mock_traceback, mock_get_olas_balance):
-        """Test withdraw_rewards method with exception getting balance"""
-        mock_get_olas_balance.side_effect = Exception("Test error")
-        mock_traceback.format_exc.return_value = "Traceback info"
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        service.logger.error = MagicMock()
-        result = service.withdraw_rewards()
-        
-        assert result == []
-        service.logger.error.assert_called()
-    
-    @patch.dict(os.environ, {"WITHDRAWAL_ADDRESS": "0x1111111111111111111111111111111111111111"})
-    @patch('triton.service.get_olas_balance')
-    @patch('triton.service.OLAS', {Chain.GNOSIS: "0x5555555555555555555555555555555555555555"})
-    def test_withdraw_rewards_success(self, mock_get_olas_balance):
-        """Test withdraw_rewards method success"""
-        mock_get_olas_balance.return_value = 1000000000000000000  # 1 OLAS in wei
-        self.mock_master_wallet.transfer.return_value = "0xabcdef1234567890"
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        result = service.withdraw_rewards()
-        
-        assert result == [("0xabcdef1234567890", 1.0, "Master Safe")]
-        self.mock_master_wallet.transfer.assert_called_once()
-    
-    @patch.dict(os.environ, {"WITHDRAWAL_ADDRESS": "0x1111111111111111111111111111111111111111"})
-    @patch('triton.service.get_olas_balance')
-    @patch('triton.service.OLAS', {Chain.GNOSIS: "0x5555555555555555555555555555555555555555"})
-    @patch('triton.service.traceback')
-    def test_withdraw_rewards_transfer_exception(self, mock_traceback, mock_get_olas_balance):
-        """Test withdraw_rewards method with transfer exception"""
-        mock_get_olas_balance.return_value = 1000000000000000000  # 1 OLAS in wei
-        self.mock_master_wallet.transfer.side_effect = Exception("Transfer failed")
-        mock_traceback.format_exc.return_value = "Traceback info"
-        
-        service = TritonService(self.mock_operate, "test_config_id")
-        service.logger.error = MagicMock()
-        result = service.withdraw_rewards()
-        
-        assert result == []
-        service.logger.error.assert_called()
-
-
-class TestTritonServiceIntegration:
-    """Integration tests for TritonService"""
-    
-    def test_service_workflow(self):
-        """Test typical service workflow"""
-        # This would be an integration test that tests the full workflow
-        # For now, we'll just verify the class can be instantiated
-        mock_operate = MagicMock()
-        mock_service_manager = MagicMock()
-        mock_wallet_manager = MagicMock()
-        mock_master_wallet = MagicMock()
-        mock_service = MagicMock()
-        
-        # Setup mock chains
-        mock_operate.service_manager.return_value = mock_service_manager
-        mock_operate.wallet_manager = mock_wallet_manager
-        mock_wallet_manager.load.return_value = mock_master_wallet
-        mock_service_manager.load.return_value = mock_service
-        
-        # Setup mock service properties
-        mock_service.name = "test_service"
-        mock_service.service_config_id = "test_config_id"
-        mock_service.home_chain = "gnosis"
-        mock_service.keys = [MagicMock()]
-        mock_service.keys[0].private_key = "test_private_key"
-        
-        # Setup mock chain configs
-        mock_chain_config = MagicMock()
-        mock_chain_data = MagicMock()
-        mock_chain_data.multisig = "0x1234567890abcdef1234567890abcdef12345678"
-        mock_chain_data.token = 123
-        mock_chain_data.instances = ["0xabcdef1234567890abcdef1234567890abcdef12"]
-        mock_chain_config.chain_data = mock_chain_data
-        
-        mock_service.chain_configs = {"gnosis": mock_chain_config}
-        
-        service = TritonService(mock_operate, "test_config_id")
-        
-        assert service is not None
-        assert service.service_id == 123
-        assert service.agent_address == "0xabcdef1234567890abcdef1234567890abcdef12"
-        assert service.service_safe == "0x1234567890abcdef1234567890abcdef12345678"
\ No newline at end of file
+    }
+
+    _wire_base_mocks(operate, service_manager, master_wallet, service)
+    return operate, service_manager, master_wallet, service
+
+
+_BASE_MOCKS = build_mock_operate()
+
+
+@pytest.fixture
+def base_mocks():
+    """Module-level mock graph, reset and rewired for the current test"""
+    for mock in _BASE_MOCKS:
+        mock.reset_mock(return_value=True, side_effect=True)
+    _wire_base_mocks(*_BASE_MOCKS)
+    return _BASE_MOCKS
+
+
+@pytest.fixture
+def mock_service(base_mocks):
+    """Mock operate service with a single gnosis chain config"""
+    return base_mocks[3]
+
+
+@pytest.fixture
+def mock_service_manager(base_mocks):
+    """Mock service manager loading the mock service"""
+    return base_mocks[1]
+
+
+@pytest.fixture
+def mock_master_wallet(base_mocks):
+    """Mock master wallet"""
+    return base_mocks[2]
+
+
+@pytest.fixture
+def mock_operate(base_mocks):
+    """Mock OperateApp wired to the service manager and master wallet mocks"""
+    return base_mocks[0]
+
+
+@pytest.fixture(autouse=True)
+def service_patches(monkeypatch):
+    """Stub the chain and contract helpers imported into triton.service"""
+    patches = SimpleNamespace(
+        get_staking_contract=MagicMock(
+            return_value=STAKING_ADDR
+        ),
+        get_staking_status_and_balances=MagicMock(return_value=({}, [0.0] * 7)),
+        get_balances=MagicMock(),
+        get_olas_balance=MagicMock(),
+        _REQUESTER_ACTIVITY_CHECKER_CONTRACT=MagicMock(),
+        _MECH_ACTIVITY_CONTRACT=MagicMock(),
+        OLAS={Chain.GNOSIS: "0x5555555555555555555555555555555555555555"},
+    )
+    for name, value in vars(patches).items():
+        monkeypatch.setattr(f"triton.service.{name}", value)
+    return patches
+
+
+@pytest.fixture
+def withdrawal_address(request, monkeypatch):
+    """WITHDRAWAL_ADDRESS env var, unset unless indirectly parametrized"""
+    address = getattr(request, "param", None)
+    if address is None:
+        monkeypatch.delenv("WITHDRAWAL_ADDRESS", raising=False)
+    else:
+        monkeypatch.setenv("WITHDRAWAL_ADDRESS", address)
+    return address
+
+
+@pytest.fixture
+def triton_service(mock_operate, withdrawal_address, monkeypatch):
+    """TritonService built on top of the mock OperateApp, with a mock logger"""
+    monkeypatch.setattr(
+        "triton.service.logging",
+        SimpleNamespace(getLogger=lambda *args, **kwargs: MagicMock(spec=logging.Logger)),
+    )
+    return TritonService(mock_operate, "test_config_id")
+
+
+@pytest.mark.parametrize("withdrawal_address", [WITHDRAWAL_ADDR], indirect=True)
+def test_init_with_withdrawal_address(triton_service, mock_service_manager, mock_master_wallet, mock_service):
+    """Test TritonService initialization with withdrawal address"""
+    assert triton_service.service_manager == mock_service_manager
+    assert triton_service.master_wallet == mock_master_wallet
+    assert triton_service.service == mock_service
+    assert triton_service.withdrawal_address == WITHDRAWAL_ADDR
+
+
+def test_init_creates_real_logger(mock_operate):
+    """Test TritonService initialization creates a real logger named after the service"""
+    service = TritonService(mock_operate, "test_config_id")
+
+    assert isinstance(service.logger, logging.Logger)
+    assert service.logger.name == "test_service"
+
+
+def test_init_without_withdrawal_address(triton_service):
+    """Test TritonService initialization without withdrawal address"""
+    assert triton_service.withdrawal_address is None
+
+
+def test_service_id_property(triton_service):
+    """Test service_id property"""
+    assert triton_service.service_id == 123
+
+
+def test_agent_address_property(triton_service):
+    """Test agent_address property"""
+    assert triton_service.agent_address == AGENT_ADDR
+
+
+def test_agent_address_property_no_instances(mock_service, triton_service, monkeypatch):
+    """Test agent_address property when no instances exist"""
+    monkeypatch.setattr(mock_service.chain_configs["gnosis"].chain_data, "instances", [])
+
+    with pytest.raises(ValueError, match="No agent instances found"):
+        triton_service.agent_address
+
+
+def test_service_safe_property(triton_service):
+    """Test service_safe property"""
+    assert triton_service.service_safe == SAFE_ADDR
+
+
+def test_staking_contract_address_property(service_patches, mock_service_manager, triton_service):
+    """Test staking_contract_address property"""
+    mock_service_manager._get_current_staking_program.return_value = "program_1"
+
+    assert triton_service.staking_contract_address == STAKING_ADDR
+    service_patches.get_staking_contract.assert_called_once_with(
+        chain="gnosis",
+        staking_program_id="program_1"
+    )
+
+
+def test_staking_contract_address_property_key_error(mock_service_manager, triton_service):
+    """Test staking_contract_address property with KeyError"""
+    mock_service_manager._get_current_staking_program.side_effect = KeyError("Not found")
+
+    with pytest.raises(ValueError, match="Failed to get staking contract address"):
+        triton_service.staking_contract_address
+
+
+@pytest.mark.parametrize(
+    "requester_side_effect,mech_side_effect,expected_mech_address,staking_status",
+    [
+        # mechMarketplace call works
+        (None, None, "0xmech123", _STAKING_STATUS_A),
+        # mechMarketplace fails but agentMech works
+        (ContractLogicError("RequesterActivityChecker failed"), None, "0xagentmech456", _STAKING_STATUS_B),
+        # Both contract calls fail and the hardcoded fallback is used
+        (
+            BadFunctionCallOutput("RequesterActivityChecker failed"),
+            ContractLogicError("MechActivity failed"),
+            "0x77af31De935740567Cf4fF1986D04B2c964A786a",
+            _STAKING_STATUS_C,
+        ),
+        # Non-geth nodes report reverts as plain ValueErrors
+        (ValueError({"code": -32015, "message": "VM execution error."}), None, "0xagentmech456", _STAKING_STATUS_B),
+        (
+            ValueError({"code": -32015, "message": "VM execution error."}),
+            ValueError({"code": -32015, "message": "VM execution error."}),
+            "0x77af31De935740567Cf4fF1986D04B2c964A786a",
+            _STAKING_STATUS_C,
+        ),
+    ],
+    ids=["mech_marketplace", "agent_mech", "fallback_mech", "agent_mech_value_error", "fallback_mech_value_error"],
+)
+def test_snapshot_mech_resolution(
+    requester_side_effect,
+    mech_side_effect,
+    expected_mech_address,
+    staking_status,
+    service_patches,
+    mock_service_manager,
+    triton_service,
+):
+    """Test snapshot mech resolution"""
+    service_patches.get_staking_status_and_balances.return_value = (staking_status, [0.0] * 7)
+    mock_service_manager._get_current_staking_program.return_value = "program_1"
+
+    # Mock the safe tx builder and staking params
+    mock_sftxb = MagicMock()
+    mock_sftxb.get_staking_params.return_value = {"activity_checker": "0xactivity123"}
+    mock_service_manager.get_eth_safe_tx_builder.return_value = mock_sftxb
+
+    # Mock the requester activity checker contract
+    mock_contract_instance = MagicMock()
+    mock_contract_instance.functions.mechMarketplace.return_value.call.return_value = "0xmech123"
+    mock_contract_instance.functions.mechMarketplace.return_value.call.side_effect = requester_side_effect
+    requester_contract = service_patches._REQUESTER_ACTIVITY_CHECKER_CONTRACT
+    requester_contract.get_instance.return_value = mock_contract_instance
+
+    # Mock the mech activity contract, only reached when mechMarketplace fails
+    mock_mech_instance = MagicMock()
+    mock_mech_instance.functions.agentMech.return_value.call.return_value = "0xagentmech456"
+    mock_mech_instance.functions.agentMech.return_value.call.side_effect = mech_side_effect
+    mech_contract = service_patches._MECH_ACTIVITY_CONTRACT
+    mech_contract.get_instance.return_value = mock_mech_instance
+
+    result = triton_service.snapshot()
+
+    assert result["staking"] == staking_status
+    service_patches.get_staking_status_and_balances.assert_called_once_with(
+        mech_contract_address=expected_mech_address,
+        staking_token_address=STAKING_ADDR,
+        activity_checker_address="0xactivity123",
+        service_id=123,
+        safe_address=SAFE_ADDR,
+        balance_queries=ANY,
+        balance_cache=None,
+    )
+
+
+def test_snapshot_rpc_error_not_cached(service_patches, mock_service_manager, triton_service):
+    """Test an RPC failure while resolving the mech is raised instead of using the fallback mech"""
+    mock_service_manager._get_current_staking_program.return_value = "program_1"
+    mock_service_manager.get_eth_safe_tx_builder.return_value.get_staking_params.return_value = {
+        "activity_checker": "0xactivity123"
+    }
+    requester_contract = service_patches._REQUESTER_ACTIVITY_CHECKER_CONTRACT
+    requester_contract.get_instance.side_effect = ConnectionError("RPC down")
+
+    with pytest.raises(ConnectionError):
+        triton_service.snapshot()
+
+    requester_contract.get_instance.side_effect = None
+    requester_contract.get_instance.return_value.functions.mechMarketplace.return_value.call.return_value = "0xmech123"
+    triton_service.snapshot()
+
+    assert service_patches.get_staking_status_and_balances.call_args.kwargs["mech_contract_address"] == "0xmech123"
+
+
+def test_snapshot_resolves_contracts_once(service_patches, mock_service_manager, triton_service):
+    """Test the staking contract, activity checker and mech are resolved once per service"""
+    mock_service_manager._get_current_staking_program.return_value = "program_1"
+    mock_service_manager.get_eth_safe_tx_builder.return_value.get_staking_params.return_value = {
+        "activity_checker": "0xactivity123"
+    }
+
+    triton_service.snapshot()
+    # Drop the cached snapshot, the resolved contracts are kept apart
+    ttl_cache_clear(triton_service)
+    triton_service.snapshot()
+
+    assert service_patches.get_staking_status_and_balances.call_count == 2
+    mock_service_manager._get_current_staking_program.assert_called_once()
+    mock_service_manager.get_eth_safe_tx_builder.assert_called_once()
+
+
+def test_check_balance_success(service_patches, mock_master_wallet, triton_service, monkeypatch):
+    """Test check_balance method success"""
+    # agent, service safe (native, wrapped), master eoa, master safe (native, OLAS), service safe OLAS
+    service_patches.get_balances.return_value = [1.0, 2.0, 1.0, 3.0, 4.0, 5.0, 5.0]
+
+    # Mock master wallet properties
+    monkeypatch.setattr(mock_master_wallet.crypto, "address", "0x3333333333333333333333333333333333333333")
+    monkeypatch.setattr(mock_master_wallet, "safes", {Chain.GNOSIS: "0x4444444444444444444444444444444444444444"})
+
+    result = triton_service.check_balance()
+
+    assert result == EXPECTED_BALANCES
+    service_patches.get_balances.assert_called_once()
+    queries = service_patches.get_balances.call_args[0][0]
+    assert [query.owner for query in queries] == [
+        AGENT_ADDR,
+        SAFE_ADDR,
+        SAFE_ADDR,
+        "0x3333333333333333333333333333333333333333",
+        "0x4444444444444444444444444444444444444444",
+        "0x4444444444444444444444444444444444444444",
+        SAFE_ADDR,
+    ]
+    assert [query.token for query in queries][5:] == [service_patches.OLAS[Chain.GNOSIS]] * 2
+    assert service_patches.get_balances.call_args[0][1] is None
+
+
+def test_snapshot(service_patches, mock_service_manager, mock_master_wallet, triton_service, monkeypatch):
+    """Test snapshot reads the staking status and the balances together"""
+    mock_service_manager._get_current_staking_program.return_value = "program_1"
+    mock_service_manager.get_eth_safe_tx_builder.return_value.get_staking_params.return_value = {
+        "activity_checker": "0xactivity123"
+    }
+    monkeypatch.setattr(mock_master_wallet, "safes", {Chain.GNOSIS: "0x4444444444444444444444444444444444444444"})
+    service_patches.get_staking_status_and_balances.return_value = (
+        {"accrued_rewards": "1.00 OLAS"},
+        [1.0, 2.0, 1.0, 3.0, 4.0, 5.0, 5.0],
+    )
+    cache = {}
+
+    result = triton_service.snapshot(cache)
+
+    assert result == {"staking": {"accrued_rewards": "1.00 OLAS"}, "balances": EXPECTED_BALANCES}
+    kwargs = service_patches.get_staking_status_and_balances.call_args.kwargs
+    assert len(kwargs["balance_queries"]) == 7
+    assert kwargs["balance_cache"] is cache
+    service_patches.get_balances.assert_not_called()
+
+
+def test_check_balance_cached(service_patches, mock_master_wallet, triton_service, monkeypatch):
+    """Test check_balance reuses its result within SERVICE_CACHE_TTL"""
+    service_patches.get_balances.return_value = [1.0, 2.0, 1.0, 3.0, 4.0, 5.0, 5.0]
+    monkeypatch.setattr(mock_master_wallet, "safes", {Chain.GNOSIS: "0x4444444444444444444444444444444444444444"})
+
+    assert triton_service.check_balance() == triton_service.check_balance({}) == EXPECTED_BALANCES
+    service_patches.get_balances.assert_called_once()
+
+
+def test_check_balance_after_claim(service_patches, mock_service_manager, triton_service):
+    """Test check_balance reads the chain again once rewards are claimed"""
+    service_patches.get_balances.return_value = [1.0, 2.0, 1.0, 3.0, 4.0, 5.0, 5.0]
+    mock_service_manager.claim_on_chain_from_safe.return_value = 1234
+
+    triton_service.check_balance()
+    triton_service.claim_rewards()
+    triton_service.check_balance()
+
+    assert service_patches.get_balances.call_count == 2
+
+
+def test_check_balance_no_instances(mock_service, triton_service, monkeypatch):
+    """Test check_balance method when no instances exist"""
+    monkeypatch.setattr(mock_service.chain_configs["gnosis"].chain_data, "instances", [])
+
+    with pytest.raises(ValueError, match="No agent instances found"):
+        triton_service.check_balance()
+
+
+def test_claim_rewards_success(mock_service_manager, triton_service):
+    """Test claim_rewards method success"""
+    mock_service_manager.claim_on_chain_from_safe.return_value = 1234
+
+    result = triton_service.claim_rewards()
+
+    assert result == 1234
+    mock_service_manager.claim_on_chain_from_safe.assert_called_once_with(
+        service_config_id="test_config_id",
+        chain="gnosis"
+    )
+
+
+def test_claim_rewards_exception(mock_service_manager, triton_service):
+    """Test claim_rewards method with exception"""
+    mock_service_manager.claim_on_chain_from_safe.side_effect = Exception("Test error")
+
+    result = triton_service.claim_rewards()
+
+    assert result == 0
+    triton_service.logger.exception.assert_called_once_with("Failed to claim rewards")
+
+
+@pytest.mark.parametrize(
+    "withdrawal_address,olas_balance,transfer_result,expected_result",
+    [
+        # No withdrawal address
+        (None, 1000000000000000000, "0xabcdef1234567890", []),
+        # No OLAS balance
+        (WITHDRAWAL_ADDR, 0, "0xabcdef1234567890", []),
+        # Exception getting balance
+        (WITHDRAWAL_ADDR, Exception("Test error"), "0xabcdef1234567890", []),
+        # Success (1 OLAS in wei)
+        (
+            WITHDRAWAL_ADDR,
+            1000000000000000000,
+            "0xabcdef1234567890",
+            [("0xabcdef1234567890", 1.0, "Master Safe")],
+        ),
+        # Transfer exception
+        (WITHDRAWAL_ADDR, 1000000000000000000, Exception("Transfer failed"), []),
+    ],
+    ids=["no_withdrawal_address", "no_balance", "get_balance_exception", "success", "transfer_exception"],
+    indirect=["withdrawal_address"],
+)
+def test_withdraw_rewards(
+    olas_balance,
+    transfer_result,
+    expected_result,
+    service_patches,
+    mock_master_wallet,
+    triton_service,
+):
+    """Test withdraw_rewards method"""
+    service_patches.get_balances.return_value = [1.0, 2.0, 1.0, 3.0, 4.0, 5.0, 5.0]
+    triton_service.check_balance()
+
+    if isinstance(olas_balance, Exception):
+        service_patches.get_olas_balance.side_effect = olas_balance
+    else:
+        service_patches.get_olas_balance.return_value = olas_balance
+
+    if isinstance(transfer_result, Exception):
+        mock_master_wallet.transfer.side_effect = transfer_result
+    else:
+        mock_master_wallet.transfer.return_value = transfer_result
+
+    result = triton_service.withdraw_rewards()
+
+    assert result == expected_result
+    if expected_result:
+        mock_master_wallet.transfer.assert_called_once()
+    # Balances are read again only after a successful withdrawal
+    triton_service.check_balance()
+    assert service_patches.get_balances.call_count == (2 if expected_result else 1)
+    if isinstance(olas_balance, Exception) or isinstance(transfer_result, Exception):
+        triton_service.logger.exception.assert_called()
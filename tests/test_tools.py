@@ -1,6 +1,7 @@
 """Tests for triton.tools module"""
 import pytest
-from triton.tools import escape_markdown_v2, wei_to_unit, wei_to_olas, str_to_bool
+from unittest.mock import patch
+from triton.tools import escape_markdown_v2, wei_to_unit, wei_to_olas, str_to_bool, ttl_cache, ttl_cache_clear
 
 
 class TestEscapeMarkdownV2:
@@ -111,4 +112,62 @@ class TestStrToBool:
     def test_str_to_bool_none(self):
         """Test None conversion"""
         result = str_to_bool(None)
-        assert result is False
\ No newline at end of file
+        assert result is False
+
+
+class TestTtlCache:
+    """Tests for ttl_cache decorator"""
+
+    class Counter:
+        """Counts the calls to its cached method"""
+
+        def __init__(self):
+            self.calls = 0
+
+        @ttl_cache(seconds=10)
+        def read(self, *args):
+            """Count a call"""
+            self.calls += 1
+            if args and isinstance(args[0], Exception):
+                raise args[0]
+            return self.calls
+
+    @patch("triton.tools.monotonic")
+    def test_cached_within_ttl(self, mock_monotonic):
+        """Test the result is reused within the TTL, whatever the arguments"""
+        mock_monotonic.return_value = 0
+        counter = self.Counter()
+
+        assert counter.read() == 1
+        mock_monotonic.return_value = 9
+        assert counter.read("ignored") == 1
+
+    @patch("triton.tools.monotonic")
+    def test_expired_after_ttl(self, mock_monotonic):
+        """Test the result is read again once the TTL has elapsed"""
+        mock_monotonic.return_value = 0
+        counter = self.Counter()
+
+        assert counter.read() == 1
+        mock_monotonic.return_value = 10
+        assert counter.read() == 2
+
+    def test_per_instance(self):
+        """Test instances do not share cached results"""
+        assert self.Counter().read() == self.Counter().read() == 1
+
+    def test_exceptions_not_cached(self):
+        """Test a failed call is not cached"""
+        counter = self.Counter()
+
+        with pytest.raises(ValueError):
+            counter.read(ValueError("RPC down"))
+        assert counter.read() == 2
+
+    def test_clear(self):
+        """Test ttl_cache_clear drops the cached results of an instance"""
+        counter = self.Counter()
+
+        assert counter.read() == 1
+        ttl_cache_clear(counter)
+        assert counter.read() == 2
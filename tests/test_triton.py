@@ -1,149 +1,198 @@
 """Tests for triton.py"""
 
 import asyncio
+import copy
+import gc
 import os
 import re
-from unittest.mock import AsyncMock, Mock, patch, mock_open
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, create_autospec, patch, mock_open
 
+import aiohttp
 import pytest
-import yaml
+import requests
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
 from operate.operate_types import Chain
 
+from triton.service import TritonService
+from triton.triton import _gather, _gather_by_sender, _pack_messages
+
+
+# ABI encoding of an empty uint256[] return value
+EMPTY_UINT256_ARRAY = (32).to_bytes(32, "big") + (0).to_bytes(32, "big")
+
+MOCK_CONFIG = {
+    "operators": {
+        "operator1": "/path/to/operator1",
+        "operator2": "/path/to/operator2",
+    }
+}
+
+
+STAKING_STATUS = {
+    "accrued_rewards": "10.5 OLAS",
+    "mech_requests_this_epoch": "5",
+    "required_mech_requests": "10",
+    "epoch_end": "2025-07-21 12:00:00",
+    "metadata": {
+        "name": "Staking Program 1",
+    }
+}
+
+
+def _wire_mock_service(service):
+    """(Re)configure the default TritonService mock return values"""
+    service.check_balance.return_value = {
+        "agent_eoa_native_balance": 0.5,
+        "service_safe_native_balance": 2.0,
+        "service_safe_wrapped_native_balance": 1.0,
+        "service_safe_olas_balance": 100.0,
+        "master_eoa_native_balance": 1.5,
+        "master_safe_native_balance": 3.0,
+        "master_safe_olas_balance": 10.0,
+    }
+    service.snapshot.side_effect = lambda balance_cache=None: {
+        "staking": STAKING_STATUS,
+        "balances": service.check_balance(balance_cache),
+    }
+    service.claim_rewards.return_value = 12445
+    service.withdraw_rewards.return_value = [("0x789ghi012jkl", 50.0, "Master Safe")]
+    service.agent_address = "0xagent123"
+    service.service_safe = "0xsafe456"
+    # Instance attributes are not part of the autospec, so set them explicitly
+    service.master_wallet = SimpleNamespace(
+        crypto=SimpleNamespace(address="0xmaster789"),
+        safes={Chain.GNOSIS: "0xmastersafe012"},
+    )
+    service.withdrawal_address = "0xwithdraw345"
+    service.service = SimpleNamespace(home_chain="gnosis")
+    service.home_chain_enum = Chain.GNOSIS
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """Run every async handler test on one shared event loop"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+# Shared by the session-scoped handlers; reset by the mock_service fixture per test
+_MOCK_SERVICE = create_autospec(TritonService, instance=True)
+
 
 class TestTritonBot:
     """Test cases for Triton Telegram bot"""
 
+    @pytest.fixture(scope="session")
+    def captured_functions(self):
+        """Run run_triton() once and capture its handler, job and lifecycle callbacks"""
+        captured_handlers = {}
+        captured_jobs = {}
+        captured_hooks = {}
+
+        # Mock the Application and its components
+        mock_app = Mock()
+        mock_builder = Mock()
+        mock_job_queue = Mock()
+
+        # Configure the builder chain, capturing the post_init and post_shutdown hooks
+        def capture_hook(hook):
+            captured_hooks[hook.__name__] = hook
+            return mock_builder
+
+        mock_builder.token.return_value = mock_builder
+        mock_builder.post_init.side_effect = capture_hook
+        mock_builder.post_shutdown.side_effect = capture_hook
+        mock_builder.build.return_value = mock_app
+
+        # Configure the app
+        mock_app.job_queue = mock_job_queue
+        mock_app.run_polling = Mock()
+
+        # Capture handlers when they're added
+        def capture_handler(handler):
+            if hasattr(handler, 'callback'):
+                captured_handlers[handler.callback.__name__] = handler.callback
+
+        mock_app.add_handler.side_effect = capture_handler
+
+        # Capture job functions when they're scheduled
+        def capture_job_once(func, when):
+            captured_jobs[func.__name__] = func
+
+        def capture_job_repeating(func, interval, first):
+            captured_jobs[func.__name__] = func
+
+        def capture_job_monthly(func, day, when):
+            captured_jobs[func.__name__] = func
+
+        mock_job_queue.run_once.side_effect = capture_job_once
+        mock_job_queue.run_repeating.side_effect = capture_job_repeating
+        mock_job_queue.run_monthly.side_effect = capture_job_monthly
+
+        # Mock other dependencies
+        with patch('triton.triton.Application.builder', return_value=mock_builder), \
+             patch('triton.triton.yaml.safe_load', return_value=MOCK_CONFIG), \
+             patch('triton.triton.OperateApp') as mock_operate_app, \
+             patch('triton.triton.TritonService', return_value=_MOCK_SERVICE), \
+             patch('builtins.open', mock_open(read_data="")):
+
+            # Mock the operate app
+            mock_operate = Mock()
+            mock_operate_service = Mock()
+            mock_operate_service.name = "service"
+            mock_operate_service.service_config_id = "service1"
+            mock_operate.service_manager.return_value.get_all_services.return_value = [[
+                mock_operate_service,
+            ]]
+            mock_operate_app.return_value = mock_operate
+
+            # Import and call run_triton to capture all handlers
+            from triton.triton import run_triton
+            run_triton()
+
+        return {**captured_handlers, **captured_jobs, **captured_hooks}
+
     @pytest.fixture
-    def mock_triton_app(self, mock_config, mock_service):
+    def mock_triton_app(self, captured_functions, mock_service):
         """
-        Mock the Triton application and capture handlers for direct execution.
+        Look up the captured Triton handlers for direct execution.
 
         Args:
             handler_name: Name of the handler to execute (e.g., 'staking_status', 'balance', 'claim')
 
         Returns:
-            A callable that executes the specified handler
+            A callable that returns the specified handler
         """
         def _create_mock_app(handler_name=None):
-            captured_handlers = {}
-            captured_jobs = {}
-
-            # Mock the Application and its components
-            mock_app = Mock()
-            mock_builder = Mock()
-            mock_job_queue = Mock()
-
-            # Configure the builder chain
-            mock_builder.token.return_value = mock_builder
-            mock_builder.post_init.return_value = mock_builder
-            mock_builder.build.return_value = mock_app
-
-            # Configure the app
-            mock_app.job_queue = mock_job_queue
-            mock_app.run_polling = Mock()
-
-            # Capture handlers when they're added
-            def capture_handler(handler):
-                if hasattr(handler, 'callback'):
-                    captured_handlers[handler.callback.__name__] = handler.callback
-
-            mock_app.add_handler.side_effect = capture_handler
-
-            # Capture job functions when they're scheduled
-            def capture_job_once(func, when):
-                captured_jobs[func.__name__] = func
-
-            def capture_job_repeating(func, interval, first):
-                captured_jobs[func.__name__] = func
-
-            def capture_job_monthly(func, day, when):
-                captured_jobs[func.__name__] = func
-
-            mock_job_queue.run_once.side_effect = capture_job_once
-            mock_job_queue.run_repeating.side_effect = capture_job_repeating
-            mock_job_queue.run_monthly.side_effect = capture_job_monthly
-
-            # Mock other dependencies
-            with patch('triton.triton.Application.builder', return_value=mock_builder), \
-                 patch('triton.triton.yaml.safe_load', return_value=mock_config), \
-                 patch('triton.triton.OperateApp') as mock_operate_app, \
-                 patch('triton.triton.TritonService', return_value=mock_service), \
-                 patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))):
-
-                # Mock the operate app
-                mock_operate = Mock()
-                mock_operate_service = Mock()
-                mock_operate_service.name = "service"
-                mock_operate_service.service_config_id = "service1"
-                mock_operate.service_manager.return_value.get_all_services.return_value = [[
-                    mock_operate_service,
-                ]]
-                mock_operate_app.return_value = mock_operate
-
-                # Import and call run_triton to capture all handlers
-                from triton.triton import run_triton
-                run_triton()
-
             # Return the requested handler or job function
             if handler_name:
-                if handler_name in captured_handlers:
-                    return captured_handlers[handler_name]
-                elif handler_name in captured_jobs:
-                    return captured_jobs[handler_name]
-                else:
-                    available = list(captured_handlers.keys()) + list(captured_jobs.keys())
-                    raise ValueError(f"Handler '{handler_name}' not found. Available: {available}")
+                if handler_name in captured_functions:
+                    return captured_functions[handler_name]
+                available = list(captured_functions.keys())
+                raise ValueError(f"Handler '{handler_name}' not found. Available: {available}")
 
             # Return all captured functions for inspection
-            return {**captured_handlers, **captured_jobs}
+            return dict(captured_functions)
 
         return _create_mock_app
 
     @pytest.fixture
     def mock_config(self):
         """Mock configuration"""
-        return {
-            "operators": {
-                "operator1": "/path/to/operator1",
-                "operator2": "/path/to/operator2",
-            }
-        }
+        return copy.deepcopy(MOCK_CONFIG)
 
     @pytest.fixture
     def mock_service(self):
-        """Mock TritonService"""
-        service = Mock()
-        service.get_staking_status.return_value = {
-            "accrued_rewards": "10.5 OLAS",
-            "mech_requests_this_epoch": "5",
-            "required_mech_requests": "10",
-            "epoch_end": "2025-07-21 12:00:00",
-            "metadata": {
-                "name": "Staking Program 1",
-            }
-        }
-        service.check_balance.return_value = {
-            "agent_eoa_native_balance": 0.5,
-            "service_safe_native_balance": 2.0,
-            "service_safe_wrapped_native_balance": 1.0,
-            "service_safe_olas_balance": 100.0,
-            "master_eoa_native_balance": 1.5,
-            "master_safe_native_balance": 3.0,
-            "master_safe_olas_balance": 10.0,
-        }
-        service.claim_rewards.return_value = 12445
-        service.withdraw_rewards.return_value = [("0x789ghi012jkl", 50.0, "Master Safe")]
-        service.agent_address = "0xagent123"
-        service.service_safe = "0xsafe456"
-        service.master_wallet.crypto.address = "0xmaster789"
-        service.master_wallet.safes = {Chain.GNOSIS: "0xmastersafe012"}
-        service.withdrawal_address = "0xwithdraw345"
-        service.service.home_chain = "gnosis"
-        return service
+        """Mock TritonService, reset to its defaults for each test"""
+        _MOCK_SERVICE.reset_mock(return_value=True, side_effect=True)
+        _wire_mock_service(_MOCK_SERVICE)
+        return _MOCK_SERVICE
 
     @pytest.fixture
     def mock_update(self):
@@ -184,14 +233,38 @@ class TestTritonBot:
             for job in expected_jobs:
                 assert job in all_functions, f"Job '{job}' not found"
 
-    def test_start_job(self, mock_triton_app, mock_context):
+    async def test_post_init_and_post_shutdown(self, mock_triton_app):
+        """Test the bot-wide HTTP session and thread pool are set up and torn down"""
+        post_init = mock_triton_app('post_init')
+        post_shutdown = mock_triton_app('post_shutdown')
+        app = SimpleNamespace(bot_data={}, bot=AsyncMock())
+
+        # Keep the shared test loop on its own default executor
+        with patch.object(asyncio.get_running_loop(), 'set_default_executor') as mock_set_default_executor:
+            await post_init(app)
+
+        session = app.bot_data["http"]
+        executor = app.bot_data["executor"]
+        assert isinstance(session, aiohttp.ClientSession)
+        assert not session.closed
+        mock_set_default_executor.assert_called_once_with(executor)
+        app.bot.set_my_commands.assert_awaited_once()
+
+        await post_shutdown(app)
+
+        assert session.closed
+        with pytest.raises(RuntimeError):
+            executor.submit(print)
+        assert app.bot_data == {}
+
+    async def test_start_job(self, mock_triton_app, mock_context):
         """Test start job using the mock_triton_app fixture"""
         # Get the start job function
         start_job = mock_triton_app('start')
         
         with patch('triton.triton.CHAT_ID', '123456789'):
             # Execute the job
-            asyncio.run(start_job(mock_context))
+            await start_job(mock_context)
         
         # Verify the call
         mock_context.bot.send_message.assert_called_once_with(
@@ -199,26 +272,17 @@ class TestTritonBot:
             text="Triton has started",
         )
 
-    def test_staking_status_handler(self, mock_triton_app, mock_update):
+    async def test_staking_status_handler(self, mock_triton_app, mock_update):
         """Test staking_status handler using the mock_triton_app fixture"""
         # Get the staking_status handler
         staking_status_handler = mock_triton_app('staking_status')
 
-        with (
-            patch('triton.triton.get_olas_price', return_value=2.5),
-            patch('triton.chain.requests.get', side_effect=Mock(
-                status_code=200,
-                json=lambda: {"name": "Staking Program 1"}
-            )),
-        ):
+        with patch('triton.triton.get_olas_price', return_value=2.5):
             # Execute the handler
-            asyncio.run(staking_status_handler(mock_update, None))
-        
+            await staking_status_handler(mock_update, None)
+
         # Verify the call
-        mock_update.message.reply_text.assert_called_once()
-        mock_update.message.called_once_with(
-            disable_web_page_preview=True,
-            parse_mode=ParseMode.MARKDOWN,
+        mock_update.message.reply_text.assert_called_once_with(
             text="""[operator1-service] 10.5 OLAS [5/10]
 Staking program: Staking Program 1
 Next epoch: 2025-07-21 12:00:00
@@ -230,13 +294,36 @@ Next epoch: 2025-07-21 12:00:00
 Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes) [$577.5]""",
         )
 
-    def test_balance_handler(self, mock_triton_app, mock_update):
+    async def test_staking_status_handler_errors_retrieved(self, mock_triton_app, mock_update, mock_service):
+        """Test a failed price lookup is retrieved when reading the services fails too"""
+        staking_status_handler = mock_triton_app('staking_status')
+        mock_service.snapshot.side_effect = ValueError("Failed to get staking status.")
+        unhandled = []
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+
+        try:
+            with patch('triton.triton.get_olas_price', side_effect=requests.ConnectionError("CoinGecko down")):
+                with pytest.raises((ValueError, requests.ConnectionError)) as excinfo:
+                    await staking_status_handler(mock_update, None)
+                await asyncio.sleep(0.1)
+                # Drop the handler frame so that a pending task would be collected
+                del excinfo
+                _wire_mock_service(mock_service)
+                gc.collect()
+        finally:
+            loop.set_exception_handler(None)
+
+        assert unhandled == []
+        mock_update.message.reply_text.assert_not_called()
+
+    async def test_balance_handler(self, mock_triton_app, mock_update):
         """Test balance handler using the mock_triton_app fixture"""
         # Get the balance handler
         balance_handler = mock_triton_app('balance')
         
         # Execute the handler
-        asyncio.run(balance_handler(mock_update, None))
+        await balance_handler(mock_update, None)
         
         # Verify the call
         mock_update.message.reply_text.assert_called_once_with(
@@ -255,13 +342,13 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
 [Master Safe](https://gnosisscan.io/address/0xmastersafe012) = 3 xDAI  10 OLAS"""
         )
 
-    def test_claim_handler(self, mock_triton_app, mock_update):
+    async def test_claim_handler(self, mock_triton_app, mock_update):
         """Test claim handler using the mock_triton_app fixture"""
         # Get the claim handler
         claim_handler = mock_triton_app('claim')
         
         # Execute the handler
-        asyncio.run(claim_handler(mock_update, None))
+        await claim_handler(mock_update, None)
         
         # Verify the call
         mock_update.message.reply_text.assert_called_once_with(
@@ -270,13 +357,13 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
 [operator2-service] Claimed 12445 OLAS rewards into the Master safe."""
         )
 
-    def test_withdraw_handler(self, mock_triton_app, mock_update):
+    async def test_withdraw_handler(self, mock_triton_app, mock_update):
         """Test withdraw handler using the mock_triton_app fixture"""
         # Get the withdraw handler
         withdraw_handler = mock_triton_app('withdraw')
         
         # Execute the handler
-        asyncio.run(withdraw_handler(mock_update, None))
+        await withdraw_handler(mock_update, None)
         
         # Verify the call
         mock_update.message.reply_text.assert_called_once_with(
@@ -287,17 +374,17 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
 \\[operator2-service] Sent the [withdrawal transaction](https://gnosisscan.io/tx/0x789ghi012jkl). 50 OLAS sent from the Master Safe to [0xwithdraw345](https://gnosisscan.io/address/0xwithdraw345) #withdraw""",
         )
 
-    def test_slots_handler(self, mock_triton_app, mock_update):
+    async def test_slots_handler(self, mock_triton_app, mock_update):
         """Test slots handler using the mock_triton_app fixture"""
         # Get the slots handler
         slots_handler = mock_triton_app('slots')
 
         with (
             patch('triton.chain.load_contract', return_value=Mock()),
-            patch('triton.chain.len', return_value=0),
+            patch('triton.chain.multicall', side_effect=lambda calls: [EMPTY_UINT256_ARRAY for _ in calls]),
         ):
             # Execute the handler
-            asyncio.run(slots_handler(mock_update, None))
+            await slots_handler(mock_update, None)
         
         # Verify the call
         mock_update.message.reply_text.assert_called_once_with(
@@ -312,7 +399,7 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
 [Expert 7 (10k OLAS)] 26 available slots"""
         )
 
-    def test_ip_handler(self, mock_triton_app, mock_update):
+    async def test_ip_handler(self, mock_triton_app, mock_update, mock_context):
         """Test ip handler using the mock_triton_app fixture"""
         ip_handler = mock_triton_app('ip_address')
 
@@ -331,24 +418,20 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
         class MockSession:
             """Mock aiohttp ClientSession"""
 
-            def get(self, url):
+            def get(self, url, timeout):
                 assert url == "https://api.ipify.org"
+                assert timeout.total == 3
                 return MockResponse()
 
-            async def __aenter__(self):
-                return self
-
-            async def __aexit__(self, exc_type, exc, tb):
-                return False
-
-        with patch('triton.triton.aiohttp.ClientSession', return_value=MockSession()):
-            asyncio.run(ip_handler(mock_update, None))
+        # The bot-wide session is created in post_init
+        mock_context.bot_data = {"http": MockSession()}
+        await ip_handler(mock_update, mock_context)
 
         mock_update.message.reply_text.assert_called_once_with(
             text="Public IP address: 1.2.3.4"
         )
 
-    def test_scheduled_jobs_handler_empty(self, mock_triton_app, mock_update, mock_context):
+    async def test_scheduled_jobs_handler_empty(self, mock_triton_app, mock_update, mock_context):
         """Test scheduled_jobs handler with no jobs using the mock_triton_app fixture"""
         mock_context.job_queue.jobs.return_value = []
         
@@ -356,7 +439,7 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
         scheduled_jobs_handler = mock_triton_app('scheduled_jobs')
         
         # Execute the handler
-        asyncio.run(scheduled_jobs_handler(mock_update, mock_context))
+        await scheduled_jobs_handler(mock_update, mock_context)
         
         # Verify the call
         mock_update.message.reply_text.assert_called_once_with("No scheduled jobs")
@@ -380,7 +463,7 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
             (0.099, 0.9, 0.09999, 4.999, 0.1, 1.0, 5.0, 6),
         ],
     )
-    def test_balance_check_job_low_balance(
+    async def test_balance_check_job_low_balance(
         self,
         mock_triton_app,
         mock_context,
@@ -406,30 +489,24 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
             "master_safe_native_balance": master_balance,
         }
 
-        # Mock the thresholds in the environment
-        with patch.dict(os.environ, {
-            'AGENT_BALANCE_THRESHOLD': str(agent_threshold),
-            'SAFE_BALANCE_THRESHOLD': str(safe_threshold),
-            'MASTER_SAFE_BALANCE_THRESHOLD': str(master_threshold),
-        }):
-            # Reload constants to pick up new thresholds
-            import importlib
-            import triton.constants
-            importlib.reload(triton.constants)
-            
+        # Patch the thresholds where the bot reads them, without reloading constants
+        with patch('triton.triton.AGENT_BALANCE_THRESHOLD', agent_threshold), \
+                patch('triton.triton.SAFE_BALANCE_THRESHOLD', safe_threshold), \
+                patch('triton.triton.MASTER_SAFE_BALANCE_THRESHOLD', master_threshold):
             # Get the balance_check job function
             balance_check_job = mock_triton_app('balance_check')
             
             # Execute the job
-            asyncio.run(balance_check_job(mock_context))
+            await balance_check_job(mock_context)
         
-        # Verify the correct number of messages were sent
-        assert mock_context.bot.send_message.call_count == expected_messages
+        # Verify the alerts are batched in a single message
+        assert mock_context.bot.send_message.call_count == min(expected_messages, 1)
         
         if expected_messages > 0:
             # Verify the content of the messages
             call_args_list = mock_context.bot.send_message.call_args_list
-            sent_messages = [call[1]["text"] for call in call_args_list]
+            sent_messages = call_args_list[0][1]["text"].split("\n\n")
+            assert len(sent_messages) == expected_messages
             
             # Check if agent balance message was sent (when agent_balance < agent_threshold)
             if agent_balance < agent_threshold:
@@ -461,14 +538,32 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
                 assert call[1]['parse_mode'] == "Markdown"
                 assert call[1]['disable_web_page_preview'] is True
 
-    def test_autoclaim_job(self, mock_triton_app, mock_context):
+    async def test_balance_check_job_long_alerts(self, mock_triton_app, mock_context, mock_service):
+        """Test balance_check splits alerts over several messages within the Telegram limit"""
+        mock_service.check_balance.return_value = {
+            "agent_eoa_native_balance": 0.0,
+            "service_safe_native_balance": 0.0,
+            "service_safe_wrapped_native_balance": 0.0,
+            "service_safe_olas_balance": 0.0,
+            "master_eoa_native_balance": 0.0,
+            "master_safe_native_balance": 0.0,
+        }
+
+        with patch('triton.triton._address_url', return_value="https://gnosisscan.io/address/" + "0" * 2000):
+            await mock_triton_app('balance_check')(mock_context)
+
+        texts = [call.kwargs["text"] for call in mock_context.bot.send_message.call_args_list]
+        assert len(texts) == 6
+        assert all(len(text) <= 4096 for text in texts)
+
+    async def test_autoclaim_job(self, mock_triton_app, mock_context):
         """Test autoclaim job when enabled/disabled using the mock_triton_app fixture"""
         with patch('triton.triton.AUTOCLAIM', False):
             # Get the autoclaim job function
             autoclaim_job = mock_triton_app('autoclaim')
             
             # Execute the job
-            asyncio.run(autoclaim_job(mock_context))
+            await autoclaim_job(mock_context)
             
             # Verify the correct number of calls
             assert mock_context.bot.send_message.call_count == 0
@@ -478,7 +573,7 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
             autoclaim_job = mock_triton_app('autoclaim')
             
             # Execute the job
-            asyncio.run(autoclaim_job(mock_context))
+            await autoclaim_job(mock_context)
             
             # Verify the correct number of calls
             assert mock_context.bot.send_message.call_count == 1
@@ -495,3 +590,56 @@ Total rewards = 231 OLAS (21 accrued + 200 in agent safes + 10 in master safes)
                 "parse_mode": ParseMode.MARKDOWN,
                 "disable_web_page_preview": True,
             }
+
+
+async def test_gather_runs_services_concurrently_in_order():
+    """Test _gather overlaps the per-service calls and keeps the service order"""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def check(service):
+        barrier.wait()  # Only passes if both calls run at the same time
+        return service.name
+
+    services = {"a": SimpleNamespace(name="a"), "b": SimpleNamespace(name="b")}
+
+    assert await _gather(services, check) == ["a", "b"]
+
+
+async def test_gather_by_sender_serializes_each_sender():
+    """Test _gather_by_sender overlaps senders, serializes each one and keeps the service order"""
+    barrier = threading.Barrier(2, timeout=5)
+    running = {"0xsender1": 0}
+
+    def send(service):
+        if service.sender == "0xsender1":
+            running["0xsender1"] += 1
+            assert running["0xsender1"] == 1  # Never two calls for one sender
+            barrier.wait()  # Only passes if the other sender runs meanwhile
+            running["0xsender1"] -= 1
+        else:
+            barrier.wait()
+            barrier.wait()
+        return service.name
+
+    services = {
+        name: SimpleNamespace(
+            name=name,
+            sender=sender,
+            master_wallet=SimpleNamespace(crypto=SimpleNamespace(address=sender)),
+        )
+        for name, sender in [("a", "0xsender1"), ("b", "0xsender2"), ("c", "0xsender1")]
+    }
+
+    assert await _gather_by_sender(services, send) == ["a", "b", "c"]
+
+
+def test_pack_messages_within_telegram_limit():
+    """Test _pack_messages fills texts up to the Telegram limit and keeps every message in order"""
+    alerts = [f"[operator{i}-service] [Agent EOA](https://gnosisscan.io/address/0x{i:040x}) balance is 0.01 xDAI " + "x" * 150 for i in range(100)]
+
+    texts = _pack_messages(alerts)
+
+    assert len(texts) > 1
+    assert all(len(text) <= 4096 for text in texts)
+    assert "\n\n".join(texts).split("\n\n") == alerts
+    assert _pack_messages([]) == []
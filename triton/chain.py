@@ -2,29 +2,42 @@
 This module provides functions to interact with the blockchain."""
 
 import datetime
+import functools
 import json
 import logging
-import math
 import os
+import tempfile
+from concurrent.futures import Future
 from http import HTTPStatus
 from pathlib import Path
-from typing import cast
-from urllib.parse import urlencode
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import dotenv
 import pytz
 import requests
+from eth_utils.abi import collapse_if_tuple
 from operate.constants import IPFS_ADDRESS
-from operate.ledger.profiles import WRAPPED_NATIVE_ASSET
-from operate.operate_types import ChainType
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from web3 import Web3
 from web3.contract import Contract
-from web3.exceptions import ABIFunctionNotFound, ContractLogicError
+from web3.exceptions import ContractLogicError, Web3Exception
 
 from triton.constants import (
     LOCAL_TIMEZONE,
+    MULTICALL3_ADDRESS,
     OLAS_TOKEN_ADDRESS_GNOSIS,
-    STAKING_CONTRACTS,
+    STAKING_CONTRACTS_CHECKSUMMED,
 )
 from triton.tools import wei_to_olas
 
@@ -34,44 +47,238 @@ dotenv.load_dotenv(override=True)
 
 GNOSIS_RPC = os.getenv("GNOSIS_RPC")
 COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY")
+OLAS_PRICE_URL = (
+    "https://api.coingecko.com/api/v3/simple/price"
+    f"?ids=autonolas&vs_currencies=usd&x_cg_demo_api_key={COINGECKO_API_KEY}"
+)
+IPFS_CACHE_DIR = Path(
+    os.getenv("IPFS_CACHE_DIR", Path.home() / ".cache" / "triton" / "ipfs")
+)
 
 # Instantiate the web3 provider and ethereum client
 web3 = Web3(Web3.HTTPProvider(GNOSIS_RPC))
 
+_LOCAL_TZ = pytz.timezone(LOCAL_TIMEZONE)
 
-def get_native_balance(address: str):
-    """Get the native balance"""
-    balance_wei = web3.eth.get_balance(web3.to_checksum_address(address))
-    balance_ether = web3.from_wei(balance_wei, "ether")
-    return balance_ether
+# Checksumming hashes the address, so do it once per distinct address
+_checksum = functools.lru_cache(maxsize=256)(Web3.to_checksum_address)
 
+# Shared HTTP session so IPFS and CoinGecko connections are kept alive
+_http = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=2, backoff_factor=0.2),
+)
+_http.mount("https://", _http_adapter)
+_http.mount("http://", _http_adapter)
 
-def load_contract(
-    contract_address: str, abi_file: str, has_abi_key: bool = True
-) -> Contract:
-    """Load a smart contract"""
+# IPFS_ADDRESS has a single {hash} placeholder, split once instead of formatting
+_IPFS_PREFIX, _IPFS_SUFFIX = IPFS_ADDRESS.split("{hash}")
+
+# Integer ceiling of the daily liveness requirement, which is scaled by 1e18
+_SECONDS_PER_DAY = 86400
+_ONE_E18 = 10**18
+
+# Last successfully fetched OLAS price, reused for OLAS_PRICE_TTL seconds
+OLAS_PRICE_TTL = 60
+_OLAS_PRICE_CACHE: Dict[str, float] = {}
+
+# Staked services change at most once per block (~5s on Gnosis), so the last
+# slots read is reused for SLOTS_TTL seconds
+SLOTS_TTL = 5
+_SLOTS_CACHE: Dict[str, Any] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_abi(abi_file: str, has_abi_key: bool = True) -> list:
+    """Load and parse an ABI file"""
     with open(Path("abis", f"{abi_file}.json"), "r", encoding="utf-8") as f:
         contract_abi = json.load(f)
         if has_abi_key:
             contract_abi = contract_abi["abi"]
+    return contract_abi
 
+
+@functools.lru_cache(maxsize=None)
+def load_contract(
+    contract_address: str, abi_file: str, has_abi_key: bool = True
+) -> Contract:
+    """Load a smart contract"""
     contract = web3.eth.contract(
-        address=web3.to_checksum_address(contract_address), abi=contract_abi
+        address=_checksum(contract_address),
+        abi=_load_abi(abi_file, has_abi_key),
     )
     return contract
 
 
-def get_wrapped_native_balance(address: str, chain: ChainType) -> float:
-    """Get the wrapped native balance"""
-    return (
-        load_contract(WRAPPED_NATIVE_ASSET[chain], "erc20", has_abi_key=False)
-        .functions.balanceOf(address)
-        .call()
-        / 10
-        ** load_contract(WRAPPED_NATIVE_ASSET[chain], "erc20", has_abi_key=False)
-        .functions.decimals()
-        .call()
+class ContractCall(NamedTuple):
+    """A read-only contract call to be batched through Multicall3"""
+
+    contract: Contract
+    fn_name: str
+    args: Tuple[Any, ...] = ()
+    allow_failure: bool = False
+    raw: bool = False
+
+
+@functools.lru_cache(maxsize=1024)
+def _encode_call(contract: Contract, fn_name: str, args: Tuple[Any, ...]) -> str:
+    """ABI-encode a contract call, e.g. balanceOf(owner) for a known owner"""
+    # Contracts come from the load_contract cache, so repeated reads of the
+    # same balances or staking state reuse their calldata
+    return contract.encode_abi(fn_name=fn_name, args=list(args))
+
+
+def multicall(calls: Sequence[ContractCall]) -> List[Any]:
+    """Run several read-only contract calls in a single Multicall3 eth_call"""
+    # Results are returned in order, unwrapped like ContractFunction.call().
+    # Calls that are allowed to fail return None when they revert, and raw
+    # calls return the undecoded ABI return data.
+    if not calls:
+        return []
+
+    multicall3_contract = load_contract(
+        MULTICALL3_ADDRESS, "multicall3", has_abi_key=False
     )
+    results = multicall3_contract.functions.aggregate3(
+        [
+            (
+                call.contract.address,
+                call.allow_failure,
+                _encode_call(call.contract, call.fn_name, call.args),
+            )
+            for call in calls
+        ]
+    ).call()
+
+    decoded: List[Any] = []
+    for call, (success, return_data) in zip(calls, results):
+        if not success or not return_data:
+            if not call.allow_failure:
+                raise ContractLogicError(f"Multicall to {call.fn_name} failed")
+            decoded.append(None)
+            continue
+
+        if call.raw:
+            decoded.append(return_data)
+            continue
+
+        output_types = [
+            collapse_if_tuple(output)
+            for output in call.contract.get_function_by_name(call.fn_name).abi[
+                "outputs"
+            ]
+        ]
+        values = list(web3.codec.decode(output_types, return_data))
+        decoded.append(values[0] if len(values) == 1 else values)
+
+    return decoded
+
+
+@functools.lru_cache(maxsize=32)
+def _erc20_decimals(token_address: str) -> int:
+    """Get the decimals of an ERC20 token, which never change"""
+    token_contract = load_contract(token_address, "erc20", has_abi_key=False)
+    return token_contract.functions.decimals().call()
+
+
+class BalanceQuery(NamedTuple):
+    """A native (token is None) or ERC20 balance to read"""
+
+    owner: str
+    token: Optional[str] = None
+
+
+def _balance_calls(queries: Sequence[BalanceQuery]) -> List[ContractCall]:
+    """Build the Multicall3 calls reading several balances in wei"""
+    multicall3_contract = load_contract(
+        MULTICALL3_ADDRESS, "multicall3", has_abi_key=False
+    )
+    return [
+        (
+            ContractCall(
+                multicall3_contract, "getEthBalance", (_checksum(query.owner),)
+            )
+            if query.token is None
+            else ContractCall(
+                load_contract(query.token, "erc20", has_abi_key=False),
+                "balanceOf",
+                (_checksum(query.owner),),
+            )
+        )
+        for query in queries
+    ]
+
+
+def _to_token_units(
+    queries: Sequence[BalanceQuery], balances_wei: Sequence[int]
+) -> List[float]:
+    """Convert balances in wei to token units"""
+    return [
+        balance_wei
+        / 10 ** (18 if query.token is None else _erc20_decimals(query.token))
+        for query, balance_wei in zip(queries, balances_wei)
+    ]
+
+
+def _read_balances(queries: Sequence[BalanceQuery]) -> List[float]:
+    """Read several native and ERC20 balances, in token units, in one eth_call"""
+    calls = _balance_calls(queries)
+    try:
+        balances_wei = multicall(calls)
+    except (Web3Exception, ValueError, requests.RequestException) as e:
+        logger.warning("Batched balance read failed, reading one by one: %s", e)
+        balances_wei = [
+            (
+                web3.eth.get_balance(call.args[0])
+                if query.token is None
+                else call.contract.functions.balanceOf(call.args[0]).call()
+            )
+            for query, call in zip(queries, calls)
+        ]
+
+    return _to_token_units(queries, balances_wei)
+
+
+# Balances shared between get_balances calls, e.g. for one bot command
+BalanceCache = Dict[BalanceQuery, "Future[float]"]
+
+
+def _shared_balances(
+    queries: Sequence[BalanceQuery],
+    cache: Optional[BalanceCache],
+    read: Callable[[List[BalanceQuery]], List[float]],
+) -> List[float]:
+    """Read the balances not yet claimed in the cache and wait for the rest"""
+    # Callers sharing a cache, possibly from several threads, read each balance
+    # once: the first caller to claim a query reads it, the others wait for it.
+    if cache is None:
+        cache = {}
+    owned = []
+    for query in dict.fromkeys(queries):
+        future: "Future[float]" = Future()
+        if cache.setdefault(query, future) is future:
+            owned.append(query)
+
+    if owned:
+        try:
+            balances = read(owned)
+        except Exception as e:  # pylint: disable=broad-except
+            for query in owned:
+                cache[query].set_exception(e)
+            raise
+        for query, balance in zip(owned, balances):
+            cache[query].set_result(balance)
+
+    return [cache[query].result() for query in queries]
+
+
+def get_balances(
+    queries: Sequence[BalanceQuery], cache: Optional[BalanceCache] = None
+) -> List[float]:
+    """Read several native and ERC20 balances, in token units, in one eth_call"""
+    return _shared_balances(queries, cache, _read_balances)
 
 
 def get_olas_balance(address: str):
@@ -81,51 +288,103 @@ def get_olas_balance(address: str):
     return olas_balance
 
 
-def get_mech_request_count(
-    mech_contract_address: str,
-    requester_address: str,
-) -> int:
-    """Get the number of requests made by a requester to a mech"""
-    mech_contract = load_contract(mech_contract_address, "mech", has_abi_key=False)
+@functools.lru_cache(maxsize=64)
+def _get_metadata_hash(staking_token_address: str) -> str:
+    """Get the hex metadata hash of a staking contract, set once at initialization"""
+    staking_token_contract = load_contract(staking_token_address, "staking_token")
+    return staking_token_contract.functions.metadataHash().call().hex()
+
+
+@functools.lru_cache(maxsize=128)
+def _fetch_ipfs_metadata(metadata_hash: str) -> dict:
+    """Fetch the staking program metadata stored on IPFS"""
+    # IPFS content is immutable, so a file cached for this hash is always valid
+    cache_file = IPFS_CACHE_DIR / f"{metadata_hash}.json"
     try:
-        mech_request_count = mech_contract.functions.mapRequestsCounts(
-            requester_address
-        ).call()
-    except (ContractLogicError, ABIFunctionNotFound, ValueError):
-        # Use mapRequestCounts for newer mechs
-        mech_request_count = mech_contract.functions.mapRequestCounts(
-            requester_address
-        ).call()
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    ipfs_address = _IPFS_PREFIX + metadata_hash + _IPFS_SUFFIX
+    response = _http.get(ipfs_address, timeout=30)
+    if response.status_code != HTTPStatus.OK:
+        raise requests.RequestException(
+            f"Failed to fetch data from {ipfs_address}: {response.status_code}"
+        )
+    metadata = response.json()
 
-    return mech_request_count
+    try:
+        IPFS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Threads resolving the same staking program may write it concurrently
+        with tempfile.NamedTemporaryFile(
+            "w", dir=IPFS_CACHE_DIR, suffix=".tmp", delete=False, encoding="utf-8"
+        ) as tmp_file:
+            json.dump(metadata, tmp_file)
+        os.replace(tmp_file.name, cache_file)
+    except OSError as e:
+        logger.warning("Could not cache IPFS metadata %s: %s", metadata_hash, e)
 
+    return metadata
 
-def get_staking_status(  # pylint: disable=too-many-locals
+
+def _staking_status_calls(
     mech_contract_address: str,
     staking_token_address: str,
     activity_checker_address: str,
     service_id: int,
     safe_address: str,
-) -> dict:
-    """Get the staking status"""
+) -> List[ContractCall]:
+    """Build the Multicall3 calls reading the staking status"""
     staking_token_contract = load_contract(staking_token_address, "staking_token")
     activity_checker_contract = load_contract(activity_checker_address, "mech_activity")
+    mech_contract = load_contract(mech_contract_address, "mech", has_abi_key=False)
+    return [
+        ContractCall(staking_token_contract, "mapServiceInfo", (service_id,)),
+        ContractCall(staking_token_contract, "getServiceInfo", (service_id,)),
+        ContractCall(
+            mech_contract, "mapRequestsCounts", (safe_address,), allow_failure=True
+        ),
+        # Use mapRequestCounts for newer mechs
+        ContractCall(
+            mech_contract, "mapRequestCounts", (safe_address,), allow_failure=True
+        ),
+        ContractCall(activity_checker_contract, "livenessRatio"),
+        ContractCall(staking_token_contract, "livenessPeriod"),
+        ContractCall(staking_token_contract, "tsCheckpoint"),
+    ]
+
+
+def _parse_staking_status(  # pylint: disable=too-many-locals
+    results: Sequence[Any], staking_token_address: str, safe_address: str
+) -> dict:
+    """Build the staking status from the results of its Multicall3 calls"""
+    (  # pylint: disable=unbalanced-tuple-unpacking
+        service_info,
+        service_info_checkpoint,
+        mech_requests_counts,
+        mech_request_counts,
+        liveness_ratio,
+        liveness_period,
+        checkpoint_ts,
+    ) = results
 
     # Rewards
-    service_info = staking_token_contract.functions.mapServiceInfo(service_id).call()
     accrued_rewards = wei_to_olas(service_info[3])
 
     # Request count (total)
-    mech_request_count = get_mech_request_count(
-        mech_contract_address=mech_contract_address,
-        requester_address=safe_address,
+    mech_request_count = (
+        mech_requests_counts
+        if mech_requests_counts is not None
+        else mech_request_counts
     )
+    if mech_request_count is None:
+        raise ValueError(f"Failed to get the mech request count for {safe_address}")
 
     # Request count (last checkpoint)
-    service_info = (staking_token_contract.functions.getServiceInfo(service_id).call())[
-        2
-    ]
-    mech_request_count_on_last_checkpoint = service_info[1] if service_info else 0
+    mech_request_count_on_last_checkpoint = (
+        service_info_checkpoint[2][1] if service_info_checkpoint[2] else 0
+    )
 
     # Request count (current epoch)
     mech_requests_this_epoch = (
@@ -133,25 +392,17 @@ def get_staking_status(  # pylint: disable=too-many-locals
     )
 
     # Required requests
-    liveness_ratio = activity_checker_contract.functions.livenessRatio().call()
-    mech_requests_24h_threshold = math.ceil((liveness_ratio * 60 * 60 * 24) / 10**18)
+    mech_requests_24h_threshold = (
+        liveness_ratio * _SECONDS_PER_DAY + _ONE_E18 - 1
+    ) // _ONE_E18
 
     # Epoch end
-    liveness_period = staking_token_contract.functions.livenessPeriod().call()
-    checkpoint_ts = staking_token_contract.functions.tsCheckpoint().call()
     epoch_end = datetime.datetime.fromtimestamp(
         checkpoint_ts + liveness_period,
-        pytz.timezone(LOCAL_TIMEZONE),
+        _LOCAL_TZ,
     )
 
-    metadata_hash = staking_token_contract.functions.metadataHash().call().hex()
-    ipfs_address = IPFS_ADDRESS.format(hash=metadata_hash)
-    response = requests.get(ipfs_address, timeout=30)
-    if response.status_code != HTTPStatus.OK:
-        raise requests.RequestException(
-            f"Failed to fetch data from {ipfs_address}: {response.status_code}"
-        )
-    metadata = response.json()
+    metadata = _fetch_ipfs_metadata(_get_metadata_hash(staking_token_address))
 
     return {
         "accrued_rewards": accrued_rewards,
@@ -162,33 +413,89 @@ def get_staking_status(  # pylint: disable=too-many-locals
     }
 
 
+def get_staking_status_and_balances(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    mech_contract_address: str,
+    staking_token_address: str,
+    activity_checker_address: str,
+    service_id: int,
+    safe_address: str,
+    balance_queries: Sequence[BalanceQuery],
+    balance_cache: Optional[BalanceCache] = None,
+) -> Tuple[dict, List[float]]:
+    """Get the staking status and several balances in a single eth_call"""
+    staking_calls = _staking_status_calls(
+        mech_contract_address,
+        staking_token_address,
+        activity_checker_address,
+        service_id,
+        safe_address,
+    )
+    staking_results: List[Any] = []
+
+    def read(queries: List[BalanceQuery]) -> List[float]:
+        try:
+            results = multicall(staking_calls + _balance_calls(queries))
+        except (Web3Exception, ValueError, requests.RequestException) as e:
+            # Only a balance read failure may reach the callers sharing the cache
+            logger.warning(
+                "Batched staking status and balance read failed, reading apart: %s",
+                e,
+            )
+            return _read_balances(queries)
+        split = len(staking_calls)
+        staking_results.extend(results[:split])
+        return _to_token_units(queries, results[split:])
+
+    balances = _shared_balances(balance_queries, balance_cache, read)
+    if not staking_results:
+        # Every balance was already read by another caller sharing the cache,
+        # or the batched read failed
+        staking_results = multicall(staking_calls)
+
+    return (
+        _parse_staking_status(staking_results, staking_token_address, safe_address),
+        balances,
+    )
+
+
 def get_olas_price() -> float | None:
     """Get OLAS price"""
-    url = "https://api.coingecko.com/api/v3/simple/price?" + urlencode(
-        {
-            "ids": "autonolas",
-            "vs_currencies": "usd",
-            "x_cg_demo_api_key": COINGECKO_API_KEY,
-        }
-    )
+    cached_at = _OLAS_PRICE_CACHE.get("timestamp")
+    if cached_at is not None and monotonic() - cached_at < OLAS_PRICE_TTL:
+        return _OLAS_PRICE_CACHE["price"]
+
     headers = {"accept": "application/json"}
-    response = requests.get(url=url, headers=headers, timeout=30)
+    response = _http.get(url=OLAS_PRICE_URL, headers=headers, timeout=30)
     if response.status_code != 200:
         logger.error(response)
         return None
     price = response.json()["autonolas"]["usd"]
+    _OLAS_PRICE_CACHE.update(price=price, timestamp=monotonic())
     return price
 
 
 def get_slots() -> dict:
     """Get the available slots in all staking contracts"""
-    slots = {}
+    # Staking contracts expose no service counter, so only the length word of
+    # the ABI-encoded getServiceIds() array is read instead of decoding it
+    cached_at = _SLOTS_CACHE.get("timestamp")
+    if cached_at is not None and monotonic() - cached_at < SLOTS_TTL:
+        return dict(_SLOTS_CACHE["slots"])
+
+    service_ids_data = multicall(
+        [
+            ContractCall(
+                load_contract(address, "staking_token"), "getServiceIds", raw=True
+            )
+            for _, address, _ in STAKING_CONTRACTS_CHECKSUMMED
+        ]
+    )
 
-    for contract_name, contract_data in STAKING_CONTRACTS.items():
-        staking_token_contract = load_contract(
-            cast(str, contract_data["address"]), "staking_token"
+    available_slots = {
+        contract_name: slots - int.from_bytes(data[32:64], "big")
+        for (contract_name, _, slots), data in zip(
+            STAKING_CONTRACTS_CHECKSUMMED, service_ids_data
         )
-        ids = staking_token_contract.functions.getServiceIds().call()
-        slots[contract_name] = cast(int, contract_data["slots"]) - len(ids)
-
-    return slots
+    }
+    _SLOTS_CACHE.update(slots=available_slots, timestamp=monotonic())
+    return dict(available_slots)
@@ -1,8 +1,10 @@
 """Constants"""
 
 import os
+from typing import Tuple, cast
 
 import dotenv
+from web3 import Web3
 
 from triton.tools import str_to_bool
 
@@ -18,6 +20,7 @@ MASTER_SAFE_BALANCE_THRESHOLD = float(os.getenv("MASTER_SAFE_BALANCE_THRESHOLD",
 AUTOCLAIM = str_to_bool(os.getenv("AUTOCLAIM", "false"))
 MANUAL_CLAIM = str_to_bool(os.getenv("MANUAL_CLAIM", "true"))
 OLAS_TOKEN_ADDRESS_GNOSIS = "0xcE11e14225575945b8E6Dc0D4F2dD4C570f79d9f"
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
 AUTOCLAIM_DAY = int(os.getenv("AUTOCLAIM_DAY", "1"))
 AUTOCLAIM_HOUR_UTC = int(os.getenv("AUTOCLAIM_HOUR_UTC", "9"))
 LOCAL_TIMEZONE = os.getenv("LOCAL_TIMEZONE", "UTC")
@@ -60,5 +63,14 @@ STAKING_CONTRACTS = {
         "slots": 26,
     },
 }
+# (name, checksummed address, slots), checksummed once at import
+STAKING_CONTRACTS_CHECKSUMMED: Tuple[Tuple[str, str, int], ...] = tuple(
+    (
+        contract_name,
+        Web3.to_checksum_address(cast(str, contract_data["address"])),
+        cast(int, contract_data["slots"]),
+    )
+    for contract_name, contract_data in STAKING_CONTRACTS.items()
+)
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN", "")
 CHAT_ID = os.getenv("CHAT_ID", "")
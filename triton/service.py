@@ -2,9 +2,9 @@
 This module defines the TritonService class, which handles the operations of the Triton bot service.
 """
 
+import functools
 import logging
 import os
-import traceback
 from typing import List, Optional, Tuple, cast
 
 import dotenv
@@ -15,19 +15,39 @@ from operate.data.contracts.requester_activity_checker.contract import (
     RequesterActivityCheckerContract,
 )
 from operate.ledger import get_default_ledger_api
-from operate.ledger.profiles import OLAS, get_staking_contract
+from operate.ledger.profiles import OLAS, WRAPPED_NATIVE_ASSET, get_staking_contract
 from operate.operate_types import Chain, LedgerType
 from operate.utils.gnosis import transfer_erc20_from_safe
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
 
 from triton.chain import (
-    get_native_balance,
+    BalanceCache,
+    BalanceQuery,
+    get_balances,
     get_olas_balance,
-    get_staking_status,
-    get_wrapped_native_balance,
+    get_staking_status_and_balances,
 )
+from triton.tools import ttl_cache, ttl_cache_clear
 
 dotenv.load_dotenv(override=True)
 
+# On-chain reads barely move within a few blocks, so bursts of commands reuse them
+SERVICE_CACHE_TTL = 10
+
+# Loading a contract package reads and parses its YAML and ABI from disk
+_REQUESTER_ACTIVITY_CHECKER_CONTRACT = cast(
+    RequesterActivityCheckerContract,
+    RequesterActivityCheckerContract.from_dir(
+        directory=str(DATA_DIR / "contracts" / "requester_activity_checker")
+    ),
+)
+_MECH_ACTIVITY_CONTRACT = cast(
+    MechActivityContract,
+    MechActivityContract.from_dir(
+        directory=str(DATA_DIR / "contracts" / "mech_activity")
+    ),
+)
+
 
 class TritonService:
     """Trader"""
@@ -39,6 +59,7 @@ class TritonService:
             ledger_type=LedgerType.ETHEREUM
         )
         self.service = self.service_manager.load(service_config_id=service_config_id)
+        self.home_chain_enum = Chain.from_string(self.service.home_chain)  # type: ignore[attr-defined]
         self.logger = logging.getLogger(self.service.name)
         self.withdrawal_address = os.getenv("WITHDRAWAL_ADDRESS", None)
 
@@ -66,7 +87,7 @@ class TritonService:
         """Get the service safe address"""
         return self.service.chain_configs[self.service.home_chain].chain_data.multisig
 
-    @property
+    @functools.cached_property
     def staking_contract_address(self) -> str:
         """Get the staking contract address"""
         try:
@@ -86,9 +107,9 @@ class TritonService:
         except KeyError as e:
             raise ValueError("Failed to get staking contract address.") from e
 
-    def get_staking_status(self) -> dict:
-        """Get the staking status"""
-        self.logger.info("Checking staking status")
+    @functools.cached_property
+    def _staking_contracts(self) -> Tuple[str, str, str]:
+        """Resolve the staking contract, activity checker and mech addresses once"""
         try:
             staking_contract_address = self.staking_contract_address
             sftxb = self.service_manager.get_eth_safe_tx_builder(
@@ -104,49 +125,33 @@ class TritonService:
             raise ValueError("Failed to get staking status.") from e
 
         try:
-            requester_activity_checker = cast(
-                RequesterActivityCheckerContract,
-                RequesterActivityCheckerContract.from_dir(
-                    directory=str(DATA_DIR / "contracts" / "requester_activity_checker")
-                ),
-            )
             mech = (
-                requester_activity_checker.get_instance(
+                _REQUESTER_ACTIVITY_CHECKER_CONTRACT.get_instance(
                     ledger_api=sftxb.ledger_api,
                     contract_address=activity_checker_contract_address,
                 )
                 .functions.mechMarketplace()
                 .call()
             )
-        except Exception:  # pylint: disable=broad-except
+        except (BadFunctionCallOutput, ContractLogicError, ValueError):
+            # Not a requester activity checker, try the mech activity checker.
+            # Non-geth nodes report reverts as plain ValueErrors.
             try:
-                mech_activity_contract = cast(
-                    MechActivityContract,
-                    MechActivityContract.from_dir(
-                        directory=str(DATA_DIR / "contracts" / "mech_activity")
-                    ),
-                )
                 mech = (
-                    mech_activity_contract.get_instance(
+                    _MECH_ACTIVITY_CONTRACT.get_instance(
                         ledger_api=sftxb.ledger_api,
                         contract_address=activity_checker_contract_address,
                     )
                     .functions.agentMech()
                     .call()
                 )
-            except Exception:  # pylint: disable=broad-except
+            except (BadFunctionCallOutput, ContractLogicError, ValueError):
                 mech = "0x77af31De935740567Cf4fF1986D04B2c964A786a"
 
-        return get_staking_status(
-            mech_contract_address=mech,
-            staking_token_address=staking_contract_address,
-            activity_checker_address=activity_checker_contract_address,
-            service_id=self.service_id,
-            safe_address=self.service_safe,
-        )
+        return staking_contract_address, activity_checker_contract_address, mech
 
-    def check_balance(self) -> dict:
-        """Check the native balance"""
+    def _balance_queries(self) -> List[BalanceQuery]:
+        """Get the balances read by check_balance"""
         chain_config = self.service.chain_configs[self.service.home_chain]
         if len(chain_config.chain_data.instances) == 0:
             raise ValueError("No agent instances found in the chain configuration")
@@ -154,21 +159,30 @@ class TritonService:
         if self.master_wallet.safes is None:
             raise ValueError("Master wallet safes not found")
 
-        agent_eoa_native_balance = get_native_balance(self.agent_address)
-        service_safe_native_balance = get_native_balance(self.service_safe)
-        service_safe_wrapped_native_balance = get_wrapped_native_balance(
-            self.service_safe,
-            Chain.from_string(self.service.home_chain),  # type: ignore[attr-defined]
-        )
-        master_eoa_native_balance = get_native_balance(
-            self.master_wallet.crypto.address
-        )
-        master_safe_address = self.master_wallet.safes[
-            Chain.from_string(self.service.home_chain)  # type: ignore[attr-defined]
+        home_chain = self.home_chain_enum
+        master_safe_address = self.master_wallet.safes[home_chain]
+        olas_address = OLAS[home_chain]
+        return [
+            BalanceQuery(self.agent_address),
+            BalanceQuery(self.service_safe),
+            BalanceQuery(self.service_safe, WRAPPED_NATIVE_ASSET[home_chain]),
+            BalanceQuery(self.master_wallet.crypto.address),
+            BalanceQuery(master_safe_address),
+            BalanceQuery(master_safe_address, olas_address),
+            BalanceQuery(self.service_safe, olas_address),
         ]
-        master_safe_native_balance = get_native_balance(master_safe_address)
-        master_safe_olas_balance = get_olas_balance(master_safe_address) / 1e18
-        service_safe_olas_balance = get_olas_balance(self.service_safe) / 1e18
+
+    def _balances_from(self, balances: List[float]) -> dict:
+        """Log and name the balances read for _balance_queries"""
+        (  # pylint: disable=unbalanced-tuple-unpacking
+            agent_eoa_native_balance,
+            service_safe_native_balance,
+            service_safe_wrapped_native_balance,
+            master_eoa_native_balance,
+            master_safe_native_balance,
+            master_safe_olas_balance,
+            service_safe_olas_balance,
+        ) = balances
 
         self.logger.info(
             "Agent EOA balance = %.2f xDAI "
@@ -193,19 +207,45 @@ class TritonService:
             "service_safe_olas_balance": service_safe_olas_balance,
         }
 
+    @ttl_cache(seconds=SERVICE_CACHE_TTL)
+    def check_balance(self, balance_cache: Optional[BalanceCache] = None) -> dict:
+        """Check the native balance"""
+        return self._balances_from(get_balances(self._balance_queries(), balance_cache))
+
+    @ttl_cache(seconds=SERVICE_CACHE_TTL)
+    def snapshot(self, balance_cache: Optional[BalanceCache] = None) -> dict:
+        """Get the staking status and the balances in a single eth_call"""
+        self.logger.info("Checking staking status")
+        staking_contract_address, activity_checker_address, mech = (
+            self._staking_contracts
+        )
+        staking_status, balances = get_staking_status_and_balances(
+            mech_contract_address=mech,
+            staking_token_address=staking_contract_address,
+            activity_checker_address=activity_checker_address,
+            service_id=self.service_id,
+            safe_address=self.service_safe,
+            balance_queries=self._balance_queries(),
+            balance_cache=balance_cache,
+        )
+        return {"staking": staking_status, "balances": self._balances_from(balances)}
+
     def claim_rewards(self) -> int:
         """Claim staking rewards"""
 
         self.logger.info("Claiming rewards")
         try:
-            return self.service_manager.claim_on_chain_from_safe(
+            claimed = self.service_manager.claim_on_chain_from_safe(
                 service_config_id=self.service.service_config_id,
                 chain=self.service.home_chain,
             )
         except Exception:  # pylint: disable=broad-except
-            self.logger.error("Failed to claim rewards. %s", traceback.format_exc())
+            self.logger.exception("Failed to claim rewards")
+            return 0
 
-        return 0
+        # Rewards and balances read before the claim are stale
+        ttl_cache_clear(self)
+        return claimed
 
     def withdraw_rewards(self) -> List[Tuple[Optional[str], float, str]]:
         """Withdraw staking rewards"""
@@ -213,13 +253,13 @@ class TritonService:
         if not self.withdrawal_address:
             return []
 
-        home_chain = Chain.from_string(self.service.home_chain)  # type: ignore[attr-defined]
+        home_chain = self.home_chain_enum
         master_safe = self.master_wallet.safes[home_chain]
 
         try:
             master_safe_olas_balance = get_olas_balance(master_safe)
         except Exception:  # pylint: disable=broad-except
-            self.logger.error("Failed to get OLAS balance. %s", traceback.format_exc())
+            self.logger.exception("Failed to get OLAS balance")
             master_safe_olas_balance = 0
 
         withdrawals: List[Tuple[Optional[str], float, str]] = []
@@ -240,19 +280,18 @@ class TritonService:
                     (tx_hash, master_safe_olas_balance / 1e18, "Master Safe")
                 )
             except Exception:  # pylint: disable=broad-except
-                self.logger.error("Failed to withdraw OLAS. %s", traceback.format_exc())
+                self.logger.exception("Failed to withdraw OLAS")
         else:
             self.logger.info("No Master safe OLAS to withdraw")
 
-        chain = Chain.from_string(self.service.home_chain)  # type: ignore[attr-defined]
-        ledger_api = get_default_ledger_api(chain=chain)
+        ledger_api = get_default_ledger_api(chain=home_chain)
         try:
             service_safe_olas_balance = get_olas_balance(self.service_safe) / 1e18
             if service_safe_olas_balance > 0:
                 self.logger.info(
                     "Withdrawing %s OLAS from safe on %s to %s",
                     service_safe_olas_balance,
-                    chain.value,
+                    home_chain.value,
                     self.withdrawal_address,
                 )
                 ethereum_crypto = self.service_manager.keys_manager.get_crypto_instance(
@@ -262,14 +301,15 @@ class TritonService:
                     ledger_api=ledger_api,
                     crypto=ethereum_crypto,
                     safe=self.service_safe,
-                    token=OLAS[chain],
+                    token=OLAS[home_chain],
                     to=self.withdrawal_address,
                     amount=service_safe_olas_balance * 1e18,
                 )
                 withdrawals.append((tx_hash, service_safe_olas_balance, "Service Safe"))
         except Exception:  # pylint: disable=broad-except
-            self.logger.error(
-                "Failed to withdraw OLAS from service safe. %s", traceback.format_exc()
-            )
+            self.logger.exception("Failed to withdraw OLAS from service safe")
 
+        if withdrawals:
+            # Balances read before the transfers are stale
+            ttl_cache_clear(self)
         return withdrawals
@@ -1,5 +1,11 @@
 """Tools"""
 
+import functools
+from time import monotonic
+from typing import Any, Callable, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
 
 def escape_markdown_v2(text: str) -> str:
     """Markdown escape"""
@@ -20,3 +26,27 @@ def wei_to_olas(wei: int) -> str:
 def str_to_bool(value: str) -> bool:
     """Converts string to bool"""
     return str(value).lower() in ["true", "1", "yes"]
+
+
+def ttl_cache(seconds: float) -> Callable[[F], F]:
+    """Cache a method result on its instance for some seconds, ignoring arguments"""
+
+    def decorator(method: F) -> F:
+        @functools.wraps(method)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            cache = self.__dict__.setdefault("_ttl_cache", {})
+            cached = cache.get(method.__name__)
+            if cached is not None and monotonic() - cached[0] < seconds:
+                return cached[1]
+            value = method(self, *args, **kwargs)
+            cache[method.__name__] = (monotonic(), value)
+            return value
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def ttl_cache_clear(instance: Any) -> None:
+    """Drop every result cached by ttl_cache on an instance"""
+    instance.__dict__.pop("_ttl_cache", None)
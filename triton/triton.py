@@ -1,8 +1,12 @@
 """ "Triton Telegram bot"""
 
+import asyncio
 import datetime
+import functools
 import logging
 import typing as t
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import aiohttp
@@ -11,12 +15,11 @@ import pytz
 import yaml
 from operate.cli import OperateApp
 from operate.constants import OPERATE
-from operate.operate_types import Chain
 from telegram import Update
-from telegram.constants import ParseMode
+from telegram.constants import MessageLimit, ParseMode
 from telegram.ext import Application, CommandHandler, ContextTypes
 
-from triton.chain import get_olas_price, get_slots
+from triton.chain import BalanceCache, get_olas_price, get_slots
 from triton.constants import (
     AGENT_BALANCE_THRESHOLD,
     AUTOCLAIM,
@@ -41,6 +44,78 @@ logger = logging.getLogger("telegram_bot")
 dotenv.load_dotenv(override=True)
 
 
+@functools.lru_cache(maxsize=None)
+def _address_url(address: str) -> str:
+    """Get the Gnosisscan URL of an address"""
+    return GNOSISSCAN_ADDRESS_URL.format(address=address)
+
+
+# Cap concurrent per-service RPC work to stay under provider rate limits
+MAX_CONCURRENT_SERVICE_CALLS = 8
+MAX_BLOCKING_CALL_WORKERS = 16
+
+T = t.TypeVar("T")
+
+
+def _pack_messages(
+    messages: t.List[str], limit: int = MessageLimit.MAX_TEXT_LENGTH
+) -> t.List[str]:
+    """Join messages with blank lines into as few texts of at most limit characters"""
+    texts: t.List[str] = []
+    for message in messages:
+        if texts and len(texts[-1]) + 2 + len(message) <= limit:
+            texts[-1] += "\n\n" + message
+        else:
+            texts.append(message)
+    return texts
+
+
+async def _gather(
+    services: t.Dict[str, TritonService], fn: t.Callable[[TritonService], T]
+) -> t.List[T]:
+    """Run a blocking call for every service concurrently, in service order"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SERVICE_CALLS)
+
+    async def _run(service: TritonService) -> T:
+        async with semaphore:
+            return await asyncio.to_thread(fn, service)
+
+    return list(await asyncio.gather(*(_run(s) for s in services.values())))
+
+
+async def _gather_by_sender(
+    services: t.Dict[str, TritonService], fn: t.Callable[[TritonService], T]
+) -> t.List[T]:
+    """Run a transaction-sending call for every service, one at a time per sender"""
+    # Services of one operator send from the same master EOA, so their
+    # transactions are serialized to avoid nonce collisions
+    groups: t.DefaultDict[str, t.List[str]] = defaultdict(list)
+    for service_name, service in services.items():
+        groups[service.master_wallet.crypto.address].append(service_name)
+
+    results: t.Dict[str, T] = {}
+
+    async def _run(service_names: t.List[str]) -> None:
+        for service_name in service_names:
+            results[service_name] = await asyncio.to_thread(fn, services[service_name])
+
+    await asyncio.gather(*(_run(service_names) for service_names in groups.values()))
+    return [results[service_name] for service_name in services]
+
+
+def _load_operator(operator_name: str, operate_path: str) -> t.Dict[str, TritonService]:
+    """Instantiate the services of one operator"""
+    operate = OperateApp(Path(operate_path) / OPERATE)
+    operate.password = OPERATE_USER_PASSWORD
+    return {
+        f"{operator_name}-{service.name}": TritonService(
+            operate=operate,
+            service_config_id=service.service_config_id,
+        )
+        for service in operate.service_manager().get_all_services()[0]
+    }
+
+
 def run_triton() -> None:  # pylint: disable=too-many-statements,too-many-locals
     """Main"""
 
@@ -48,16 +123,17 @@ def run_triton() -> None:  # pylint: disable=too-many-statements,too-many-locals
     with open("config.yaml", "r", encoding="utf-8") as config_file:
         config = yaml.safe_load(config_file)
 
-    # Instantiate the services
+    # Instantiate the services, loading the operators in parallel
+    operators = config["operators"]
     services: t.Dict[str, TritonService] = {}
-    for operator_name, operate_path in config["operators"].items():
-        operate = OperateApp(Path(operate_path) / OPERATE)
-        operate.password = OPERATE_USER_PASSWORD
-        for service in operate.service_manager().get_all_services()[0]:
-            services[f"{operator_name}-{service.name}"] = TritonService(
-                operate=operate,
-                service_config_id=service.service_config_id,
-            )
+    with ThreadPoolExecutor(max_workers=max(len(operators), 1)) as executor:
+        for operator_services in executor.map(
+            _load_operator, operators.keys(), operators.values()
+        ):
+            services.update(operator_services)
+
+    # Service names are fixed at startup, escape them once for Markdown messages
+    escaped_names = {name: escape_markdown_v2(name) for name in services}
 
     # Commands
     async def staking_status(  # pylint: disable=unused-argument,too-many-locals
@@ -69,13 +145,16 @@ def run_triton() -> None:  # pylint: disable=too-many-statements,too-many-locals
         master_safe_olas = 0.0
         agent_safe_olas = 0.0
         master_safe_addresses: set[str] = set()
-        for service_name, service in services.items():
-            status = service.get_staking_status()
+        balance_cache: BalanceCache = {}
+        # The price does not depend on the services, fetch it meanwhile
+        snapshots, olas_price = await asyncio.gather(
+            _gather(services, lambda service: service.snapshot(balance_cache)),
+            asyncio.to_thread(get_olas_price),
+        )
+        for (service_name, service), snapshot in zip(services.items(), snapshots):
+            status, balances = snapshot["staking"], snapshot["balances"]
             total_rewards += float(status["accrued_rewards"].split(" ")[0])
-            balances = service.check_balance()
-            master_safe_address = service.master_wallet.safes[
-                Chain.from_string(service.service.home_chain)  # type: ignore[attr-defined]
-            ]
+            master_safe_address = service.master_wallet.safes[service.home_chain_enum]
             if master_safe_address not in master_safe_addresses:
                 master_safe_addresses.add(master_safe_address)
                 master_safe_olas += balances["master_safe_olas_balance"]
@@ -88,7 +167,6 @@ Next epoch: {status['epoch_end']}"""
             )
 
         combined_rewards = total_rewards + master_safe_olas + agent_safe_olas
-        olas_price = get_olas_price()
         rewards_value = combined_rewards * olas_price if olas_price else None
         message = f"Total rewards = {combined_rewards:g} OLAS"
         breakdown_parts = []
@@ -110,12 +188,15 @@ Next epoch: {status['epoch_end']}"""
 
         await update.message.reply_text(text=("\n\n").join(messages))
 
-    async def balance(
+    async def balance(  # pylint: disable=too-many-locals
         update: Update, context: ContextTypes.DEFAULT_TYPE
     ):  # pylint: disable=unused-argument
         messages = []
-        for service_name, service in services.items():
-            balances = service.check_balance()
+        balance_cache: BalanceCache = {}
+        all_balances = await _gather(
+            services, lambda service: service.check_balance(balance_cache)
+        )
+        for (service_name, service), balances in zip(services.items(), all_balances):
             agent_native_balance = balances["agent_eoa_native_balance"]
             safe_native_balance = balances["service_safe_native_balance"]
             safe_wrapped_native_balance = balances[
@@ -131,12 +212,12 @@ Next epoch: {status['epoch_end']}"""
 
             message = (
                 r"\["
-                + escape_markdown_v2(service_name)
+                + escaped_names[service_name]
                 + r"]"
-                + f"\n[Agent EOA]({GNOSISSCAN_ADDRESS_URL.format(address=service.agent_address)}) = {agent_native_balance:g} xDAI"  # noqa: E501
-                + f"\n[Service Safe]({GNOSISSCAN_ADDRESS_URL.format(address=service.service_safe)}) = {safe_native_balance:g} xDAI  {safe_wrapped_native_balance:g} wxDAI  {safe_olas_balance:g} OLAS"  # noqa: E501
-                + f"\n[Master EOA]({GNOSISSCAN_ADDRESS_URL.format(address=service.master_wallet.crypto.address)}) = {master_eoa_native_balance:g} xDAI"  # noqa: E501
-                + f"\n[Master Safe]({GNOSISSCAN_ADDRESS_URL.format(address=service.master_wallet.safes[Chain.from_string(service.service.home_chain)])}) = {master_safe_native_balance:g} xDAI  {master_safe_olas_balance:g} OLAS"  # type: ignore[attr-defined]  # noqa: E501
+                + f"\n[Agent EOA]({_address_url(service.agent_address)}) = {agent_native_balance:g} xDAI"  # noqa: E501
+                + f"\n[Service Safe]({_address_url(service.service_safe)}) = {safe_native_balance:g} xDAI  {safe_wrapped_native_balance:g} wxDAI  {safe_olas_balance:g} OLAS"  # noqa: E501
+                + f"\n[Master EOA]({_address_url(service.master_wallet.crypto.address)}) = {master_eoa_native_balance:g} xDAI"  # noqa: E501
+                + f"\n[Master Safe]({_address_url(service.master_wallet.safes[service.home_chain_enum])}) = {master_safe_native_balance:g} xDAI  {master_safe_olas_balance:g} OLAS"  # noqa: E501
             )
 
             messages.append(message)
@@ -166,7 +247,7 @@ Next epoch: {status['epoch_end']}"""
 
         messages = []
         for service_name, service in services.items():
-            claimed_amount = service.claim_rewards()
+            claimed_amount = await asyncio.to_thread(service.claim_rewards)
             if not claimed_amount:
                 continue
 
@@ -188,21 +269,21 @@ Next epoch: {status['epoch_end']}"""
 
         messages = []
         for service_name, service in services.items():
-            withdrawals = service.withdraw_rewards()
+            withdrawals = await asyncio.to_thread(service.withdraw_rewards)
             if withdrawals:
                 for tx_hash, value, source in withdrawals:
                     message = (
                         r"\["
-                        + escape_markdown_v2(service_name)
+                        + escaped_names[service_name]
                         + r"] "
                         + f"Sent the [withdrawal transaction]({GNOSISSCAN_TX_URL.format(tx_hash=tx_hash)}). "
                         + f"{value:g} OLAS sent from the {source} to [{service.withdrawal_address}]"
-                        + f"({GNOSISSCAN_ADDRESS_URL.format(address=service.withdrawal_address)}) #withdraw"
+                        + f"({_address_url(service.withdrawal_address)}) #withdraw"
                     )
             else:
                 message = (
                     r"\["
-                    + escape_markdown_v2(service_name)
+                    + escaped_names[service_name]
                     + r"] "
                     + "Cannot withdraw rewards"
                 )
@@ -222,7 +303,7 @@ Next epoch: {status['epoch_end']}"""
             logger.error("Cannot send message, update.message is None")
             return
 
-        slots = get_slots()
+        slots = await asyncio.to_thread(get_slots)
 
         messages = [
             f"[{contract_name}] {n_slots} available slots"
@@ -233,14 +314,14 @@ Next epoch: {status['epoch_end']}"""
             text=("\n").join(messages),
         )
 
-    async def ip_address(  # pylint: disable=unused-argument
-        update: Update, context: ContextTypes.DEFAULT_TYPE
-    ) -> None:
+    async def ip_address(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Reply with the server public IP address."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get("https://api.ipify.org") as response:
-                    ip = (await response.text()).strip()
+            session: aiohttp.ClientSession = context.bot_data["http"]
+            async with session.get(
+                "https://api.ipify.org", timeout=aiohttp.ClientTimeout(total=3)
+            ) as response:
+                ip = (await response.text()).strip()
         except Exception as exc:  # pylint: disable=broad-except
             logger.error("Failed to get public IP: %s", exc)
             ip = "Unavailable"
@@ -282,8 +363,14 @@ Next epoch: {status['epoch_end']}"""
 
     async def balance_check(context: ContextTypes.DEFAULT_TYPE):
         logger.info("Running balance check task")
-        for service_name, triton_service in services.items():
-            balances = triton_service.check_balance()
+        balance_cache: BalanceCache = {}
+        alerts: t.List[str] = []
+        all_balances = await _gather(
+            services, lambda service: service.check_balance(balance_cache)
+        )
+        for (service_name, triton_service), balances in zip(
+            services.items(), all_balances
+        ):
             agent_native_balance = balances["agent_eoa_native_balance"]
             safe_native_balance = balances["service_safe_native_balance"]
             safe_wrapped_native_balance = balances[
@@ -298,43 +385,44 @@ Next epoch: {status['epoch_end']}"""
                 continue
 
             master_safe_address = triton_service.master_wallet.safes[
-                Chain.from_string(triton_service.service.home_chain)  # type: ignore[attr-defined]
+                triton_service.home_chain_enum
             ]
 
             if agent_native_balance < AGENT_BALANCE_THRESHOLD:
-                message = f"[{service_name}] [Agent EOA]({GNOSISSCAN_ADDRESS_URL.format(address=triton_service.agent_address)}) balance is {agent_native_balance:g} xDAI"  # noqa: E501
-                await context.bot.send_message(
-                    chat_id=CHAT_ID,
-                    text=message,
-                    parse_mode=ParseMode.MARKDOWN,
-                    disable_web_page_preview=True,
-                )
+                message = f"[{service_name}] [Agent EOA]({_address_url(triton_service.agent_address)}) balance is {agent_native_balance:g} xDAI"  # noqa: E501
+                alerts.append(message)
 
             if (
                 safe_native_balance + safe_wrapped_native_balance
                 < SAFE_BALANCE_THRESHOLD
             ):
-                message = f"[{service_name}] [Service Safe]({GNOSISSCAN_ADDRESS_URL.format(address=triton_service.service_safe)}) balance is {safe_native_balance:g} xDAI  {safe_wrapped_native_balance:g} wxDAI"  # noqa: E501
-                await context.bot.send_message(
-                    chat_id=CHAT_ID,
-                    text=message,
-                    parse_mode=ParseMode.MARKDOWN,
-                    disable_web_page_preview=True,
-                )
+                message = f"[{service_name}] [Service Safe]({_address_url(triton_service.service_safe)}) balance is {safe_native_balance:g} xDAI  {safe_wrapped_native_balance:g} wxDAI"  # noqa: E501
+                alerts.append(message)
 
             if master_safe_native_balance < MASTER_SAFE_BALANCE_THRESHOLD:
                 message = (
-                    f"[{service_name}] [Master Safe]({GNOSISSCAN_ADDRESS_URL.format(address=master_safe_address)}) "
+                    f"[{service_name}] [Master Safe]({_address_url(master_safe_address)}) "
                     f"balance is {master_safe_native_balance:g} xDAI"
                 )
-                await context.bot.send_message(
-                    chat_id=CHAT_ID,
-                    text=message,
-                    parse_mode=ParseMode.MARKDOWN,
-                    disable_web_page_preview=True,
-                )
+                alerts.append(message)
+
+        for text in _pack_messages(alerts):
+            await context.bot.send_message(
+                chat_id=CHAT_ID,
+                text=text,
+                parse_mode=ParseMode.MARKDOWN,
+                disable_web_page_preview=True,
+            )
 
     async def post_init(app):
+        # Shared HTTP session for the bot lifetime, closed in post_shutdown
+        app.bot_data["http"] = aiohttp.ClientSession()
+        # Bounded pool for the blocking RPC calls offloaded with asyncio.to_thread
+        executor = ThreadPoolExecutor(
+            max_workers=MAX_BLOCKING_CALL_WORKERS, thread_name_prefix="triton"
+        )
+        app.bot_data["executor"] = executor
+        asyncio.get_running_loop().set_default_executor(executor)
         # await app.bot.set_my_name("Triton")
         await app.bot.set_my_description("A bot to manage Olas staked services")
         await app.bot.set_my_short_description("A bot to manage Olas staked services")
@@ -350,6 +438,14 @@ Next epoch: {status['epoch_end']}"""
             ]
         )
 
+    async def post_shutdown(app):
+        session = app.bot_data.pop("http", None)
+        if session is not None:
+            await session.close()
+        executor = app.bot_data.pop("executor", None)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     async def autoclaim(context: ContextTypes.DEFAULT_TYPE):
         logger.info("Running autoclaim task")
 
@@ -360,28 +456,31 @@ Next epoch: {status['epoch_end']}"""
         messages = []
 
         # Claim
-        for service in services.values():
-            service.claim_rewards()
+        await _gather_by_sender(services, lambda service: service.claim_rewards())
 
         # Withdraw
-        for service_name, service in services.items():
-            withdrawals = service.withdraw_rewards()
+        all_withdrawals = await _gather_by_sender(
+            services, lambda service: service.withdraw_rewards()
+        )
+        for (service_name, service), withdrawals in zip(
+            services.items(), all_withdrawals
+        ):
             if withdrawals:
                 for tx_hash, value, source in withdrawals:
                     message = (
                         r"\["
-                        + escape_markdown_v2(service_name)
+                        + escaped_names[service_name]
                         + r"] "
                         + "(Autoclaim) Sent the [withdrawal transaction]"
                         + f"({GNOSISSCAN_TX_URL.format(tx_hash=tx_hash)}). "
                         + f"{value:g} OLAS sent from the {source} to [{service.withdrawal_address}]"
-                        + f"({GNOSISSCAN_ADDRESS_URL.format(address=service.withdrawal_address)}) #withdraw"
+                        + f"({_address_url(service.withdrawal_address)}) #withdraw"
                     )
                     messages.append(message)
             else:
                 message = (
                     r"\["
-                    + escape_markdown_v2(service_name)
+                    + escaped_names[service_name]
                     + r"] "
                     + "(Autoclaim) Cannot withdraw rewards"
                 )
@@ -400,7 +499,13 @@ Next epoch: {status['epoch_end']}"""
         )
 
     # Create bot
-    app = Application.builder().token(TELEGRAM_TOKEN).post_init(post_init).build()
+    app = (
+        Application.builder()
+        .token(TELEGRAM_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     if app.job_queue is None:
         raise RuntimeError("Job queue is not available")
 